@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+import copy
+import json
+import os
+from config.settings import Settings
+from parser.json_parser import JsonParser
+from parser.poem_filter import PoemFilter
+from parser.poem_sorter import load_poems
+from formatter.page_formatter import PageFormatter
+
+class Layout:
+    """页面排版参数（可哈希，用作渲染缓存的键）"""
+
+    __slots__ = ('lines_per_page', 'chars_per_line', 'enable_decoration', 'border_style')
+
+    def __init__(self, lines_per_page, chars_per_line, enable_decoration=True, border_style='double'):
+        self.lines_per_page = int(lines_per_page)
+        self.chars_per_line = int(chars_per_line)
+        self.enable_decoration = bool(enable_decoration)
+        self.border_style = border_style
+
+    @classmethod
+    def from_settings(cls, settings):
+        """从配置中取出排版参数"""
+        return cls(settings.lines_per_page, settings.chars_per_line,
+                   settings.enable_decoration, settings.border_style)
+
+    def key(self):
+        return (self.lines_per_page, self.chars_per_line, self.enable_decoration, self.border_style)
+
+    def __eq__(self, other):
+        return isinstance(other, Layout) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        return (f"Layout({self.lines_per_page}行×{self.chars_per_line}字符, "
+                f"装饰={'开' if self.enable_decoration else '关'}, 边框={self.border_style})")
+
+    def apply_to(self, settings):
+        """生成应用了本排版参数的配置副本"""
+        layout_settings = copy.copy(settings)
+        layout_settings.lines_per_page = self.lines_per_page
+        layout_settings.chars_per_line = self.chars_per_line
+        layout_settings.enable_decoration = self.enable_decoration
+        layout_settings.border_style = self.border_style
+        return layout_settings
+
+
+class PoetryLibrary:
+    """进程内库接口：加载诗词 → 遍历分类 → 按排版渲染诗词页面
+
+    与 main.py 不同，这里不打印任何信息，也不写入磁盘（poem_order 排序的临时文件除外，close() 时删除）；
+    解析警告记录在 warnings 中。
+    诗词编号为 "分类名/序号"，序号从1开始，与生成文件名中的序号一致。
+    """
+
+    def __init__(self, settings=None, base_dir=None):
+        """初始化
+        Args:
+            settings: 配置（可选，默认使用 Settings 默认值）
+            base_dir: 解析相对路径（input_directory）时的基准目录，默认为当前目录
+        """
+        self.settings = settings or Settings()
+        self.base_dir = base_dir or os.getcwd()
+        self.poems_by_category = {}
+        self.warnings = []
+        self._formatters = {}  # {Layout: PageFormatter}
+        self._sorter = None  # poem_order 不为 none 时持有排序结果的临时文件
+
+    @classmethod
+    def from_config_file(cls, config_file):
+        """从配置文件创建，相对路径以配置文件所在目录为基准"""
+        with open(config_file, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        settings = Settings()
+        settings.load_from_dict(config)
+        return cls(settings, base_dir=os.path.dirname(os.path.abspath(config_file)))
+
+    @property
+    def default_layout(self):
+        return Layout.from_settings(self.settings)
+
+    def load(self):
+        """解析诗词JSON（按配置筛选）
+        Returns:
+            PoetryLibrary: 自身，便于链式调用
+        """
+        JsonParser.TITLE_SEPARATOR = self.settings.title_separator
+        poetry_root = os.path.abspath(os.path.join(self.base_dir, self.settings.poetry_root_dir))
+        if not os.path.isdir(poetry_root):
+            raise FileNotFoundError(f"诗词根目录不存在: {poetry_root}")
+
+        parser = JsonParser(poetry_root, text_conversion=self.settings.text_conversion, verbose=False)
+        self.close()
+        poems_by_category, self._sorter = load_poems(parser, self.settings, PoemFilter.from_settings(self.settings))
+        self.poems_by_category = {
+            category: poems for category, poems in sorted(poems_by_category.items()) if poems
+        }
+        self.warnings = parser.warnings
+        return self
+
+    def close(self):
+        """释放排序用的临时文件（poem_order 为 none 时无需调用）"""
+        if self._sorter:
+            self._sorter.close()
+            self._sorter = None
+            self.poems_by_category = {}
+
+    def categories(self):
+        """分类列表
+        Returns:
+            list: [(分类名, 诗词数量)]
+        """
+        return [(category, len(poems)) for category, poems in self.poems_by_category.items()]
+
+    def iter_poems(self, category, offset=0, limit=None):
+        """遍历分类中的诗词
+        Args:
+            category: 分类名
+            offset: 起始位置（从0开始，负数时抛出 ValueError）
+            limit: 最多返回数量
+        Yields:
+            tuple: (诗词编号, 诗词)
+        """
+        if offset < 0:
+            raise ValueError(f"offset 不能为负数: {offset}")
+        poems = self._category_poems(category)
+        end = len(poems) if limit is None else min(len(poems), offset + limit)
+        for idx in range(offset, end):
+            yield f"{category}/{idx + 1}", poems[idx]
+
+    def get_poem(self, poem_id):
+        """按编号取诗词
+        Args:
+            poem_id: 诗词编号 "分类名/序号"
+        Returns:
+            dict: 诗词
+        """
+        category, _, index = poem_id.rpartition('/')
+        poems = self._category_poems(category)
+        try:
+            idx = int(index)
+        except ValueError:
+            raise KeyError(f"无效的诗词编号: {poem_id}")
+        if not 1 <= idx <= len(poems):
+            raise KeyError(f"诗词编号超出范围: {poem_id}")
+        return poems[idx - 1]
+
+    def formatter_for(self, layout=None):
+        """取指定排版的格式化器（按排版复用）"""
+        layout = layout or self.default_layout
+        formatter = self._formatters.get(layout)
+        if formatter is None:
+            formatter = PageFormatter(layout.apply_to(self.settings))
+            self._formatters[layout] = formatter
+        return formatter
+
+    def render_poem(self, poem_id, layout=None):
+        """渲染单首诗词的全部页面（与一首一文件模式的输出一致）
+        Args:
+            poem_id: 诗词编号 "分类名/序号"
+            layout: 排版参数（可选，默认使用配置中的排版）
+        Returns:
+            list: 页面列表，每个页面是字符串
+        """
+        return self.formatter_for(layout).format_poem(self.get_poem(poem_id))
+
+    def _category_poems(self, category):
+        if category not in self.poems_by_category:
+            raise KeyError(f"分类不存在: {category}")
+        return self.poems_by_category[category]
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""本地渲染服务
+
+按需渲染诗词页面，供本地预览工具和设备的 Wi-Fi 同步程序使用，无需先完整生成到磁盘。
+
+接口（均为 GET）:
+    /categories                                  分类列表
+    /categories/<分类名>/poems?offset=0&limit=100 分类中的诗词列表
+    /poems/<分类名>/<序号>/pages                  诗词全部页面（JSON）
+    /poems/<分类名>/<序号>/pages/<页码>           单页纯文本
+    /stats                                       页面缓存统计
+排版参数通过查询参数指定：lines、columns、decoration(0/1)、border(double/single/none)，
+缺省时使用配置中的排版；lines 为 4~100，columns 为 3~100。
+"""
+import json
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+from urllib.error import HTTPError
+from urllib.request import urlopen
+from api.library import Layout
+
+# 查询参数允许的页面尺寸上限（远大于实际设备的屏幕），
+# 限制排版参数的取值范围，也就限制了按宽度缓存的排版片段（layout_primitives）的数量
+MAX_LINES_PER_PAGE = 100
+MAX_CHARS_PER_LINE = 100
+
+class PageCache:
+    """渲染结果的LRU缓存，键为 (诗词编号, 排版)，线程安全"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key, render):
+        """命中时返回缓存，否则调用 render() 渲染并放入缓存"""
+        with self._lock:
+            pages = self._entries.get(key)
+            if pages is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return pages
+            self.misses += 1
+
+        # 渲染在锁外进行，避免阻塞其他请求
+        pages = render()
+
+        with self._lock:
+            self._entries[key] = pages
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return pages
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """渲染服务请求处理"""
+
+    server_version = 'PoetryRenderServer/1.0'
+
+    def log_message(self, format, *args):
+        # 不打印访问日志
+        pass
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = [unquote(part) for part in url.path.strip('/').split('/') if part]
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        try:
+            if parts == ['categories']:
+                self._send_json([
+                    {'name': name, 'count': count} for name, count in self.server.library.categories()
+                ])
+            elif len(parts) == 3 and parts[0] == 'categories' and parts[2] == 'poems':
+                offset = int(query.get('offset', 0))
+                limit = int(query.get('limit', 100))
+                self._send_json([
+                    {'id': poem_id, 'title': poem['title'], 'author': poem['author']}
+                    for poem_id, poem in self.server.library.iter_poems(parts[1], offset, limit)
+                ])
+            elif len(parts) in (4, 5) and parts[0] == 'poems' and parts[3] == 'pages':
+                poem_id = f"{parts[1]}/{parts[2]}"
+                pages = self._render(poem_id, self._layout(query))
+                if len(parts) == 4:
+                    self._send_json({'id': poem_id, 'total': len(pages), 'pages': pages})
+                else:
+                    page_num = int(parts[4])
+                    if not 1 <= page_num <= len(pages):
+                        raise KeyError(f"页码超出范围: {page_num}")
+                    self._send_text(pages[page_num - 1])
+            elif parts == ['stats']:
+                self._send_json(self.server.page_cache.stats())
+            else:
+                self._send_error(404, f"未知路径: {url.path}")
+        except KeyError as e:
+            self._send_error(404, str(e.args[0]) if e.args else str(e))
+        except ValueError as e:
+            self._send_error(400, f"参数错误: {e}")
+
+    def _layout(self, query):
+        """根据查询参数确定排版，缺省项取配置值"""
+        default = self.server.library.default_layout
+        border = query.get('border', default.border_style)
+        if border not in ('double', 'single', 'none'):
+            raise ValueError(f"border={border}")
+        layout = Layout(
+            query.get('lines', default.lines_per_page),
+            query.get('columns', default.chars_per_line),
+            query.get('decoration', '1' if default.enable_decoration else '0') not in ('0', 'false'),
+            border,
+        )
+        if layout.lines_per_page < 4 or layout.chars_per_line < 3:
+            raise ValueError(f"页面过小: {layout.lines_per_page}行×{layout.chars_per_line}字符")
+        if layout.lines_per_page > MAX_LINES_PER_PAGE or layout.chars_per_line > MAX_CHARS_PER_LINE:
+            raise ValueError(f"页面过大: {layout.lines_per_page}行×{layout.chars_per_line}字符，"
+                             f"最大 {MAX_LINES_PER_PAGE}行×{MAX_CHARS_PER_LINE}字符")
+        return layout
+
+    def _render(self, poem_id, layout):
+        library = self.server.library
+        library.get_poem(poem_id)  # 编号无效时直接报错，不进入缓存
+        return self.server.page_cache.get_or_render(
+            (poem_id, layout), lambda: library.render_poem(poem_id, layout)
+        )
+
+    def _send_json(self, data, status=200):
+        self._send(status, json.dumps(data, ensure_ascii=False).encode('utf-8'), 'application/json; charset=utf-8')
+
+    def _send_text(self, text, status=200):
+        self._send(status, text.encode('utf-8'), 'text/plain; charset=utf-8')
+
+    def _send_error(self, status, message):
+        self._send_json({'error': message}, status)
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class RenderServer(ThreadingHTTPServer):
+    """本地渲染服务"""
+
+    daemon_threads = True
+
+    def __init__(self, library, host='127.0.0.1', port=8000, cache_size=1024):
+        """初始化
+        Args:
+            library: 已加载的 PoetryLibrary
+            host: 监听地址
+            port: 监听端口（0 表示自动分配）
+            cache_size: 页面缓存最多保存的诗词渲染结果数
+        """
+        super().__init__((host, port), RenderRequestHandler)
+        self.library = library
+        self.page_cache = PageCache(cache_size)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start_background(self):
+        """在后台线程中运行服务
+        Returns:
+            threading.Thread: 服务线程
+        """
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class RenderClient:
+    """渲染服务的客户端（用于本地联调和回环测试）"""
+
+    def __init__(self, base_url, timeout=10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def categories(self):
+        return self._get_json('/categories')
+
+    def poems(self, category, offset=0, limit=100):
+        return self._get_json(f"/categories/{quote(category)}/poems?offset={offset}&limit={limit}")
+
+    def pages(self, poem_id, layout=None):
+        return self._get_json(self._pages_path(poem_id) + self._layout_query(layout))['pages']
+
+    def page(self, poem_id, page_num, layout=None):
+        return self._get(f"{self._pages_path(poem_id)}/{page_num}{self._layout_query(layout)}").decode('utf-8')
+
+    def stats(self):
+        return self._get_json('/stats')
+
+    @staticmethod
+    def _pages_path(poem_id):
+        category, _, index = poem_id.rpartition('/')
+        return f"/poems/{quote(category)}/{index}/pages"
+
+    @staticmethod
+    def _layout_query(layout):
+        if layout is None:
+            return ''
+        return (f"?lines={layout.lines_per_page}&columns={layout.chars_per_line}"
+                f"&decoration={int(layout.enable_decoration)}&border={layout.border_style}")
+
+    def _get(self, path):
+        try:
+            with urlopen(self.base_url + path, timeout=self.timeout) as response:
+                return response.read()
+        except HTTPError as e:
+            message = json.loads(e.read().decode('utf-8')).get('error', e.reason)
+            raise KeyError(message) if e.code == 404 else ValueError(message)
+
+    def _get_json(self, path):
+        return json.loads(self._get(path).decode('utf-8'))
@@ -1,5 +1,13 @@
 # -*- coding: utf-8 -*-
+import copy
 import json
+import os
+
+# 只能在顶层配置的项：诗词数据只按顶层配置解析、排序一次，渲染缓存也由各输出配置共享
+PROFILE_TOP_LEVEL_KEYS = (
+    'input_directory', 'poem_length_range', 'poem_filter', 'poem_order', 'sort_memory_mb', 'temp_directory',
+    'title_separator', 'text_conversion', 'render_cache_path', 'render_cache_max_mb', 'profiles',
+)
 
 class Settings:
     """项目配置管理"""
@@ -13,6 +21,18 @@ class Settings:
         self.min_poem_length = 5
         self.max_poem_length = 1000
 
+        # 诗词筛选条件（在规范化和简繁转换之前求值）
+        self.author_include = []  # 只保留这些作者（为空则不限制）
+        self.author_exclude = []  # 排除这些作者
+        self.title_regex = ''  # 标题需匹配的正则表达式（为空则不限制）
+        self.category_include = []  # 只处理这些分类目录（为空则不限制）
+        self.category_exclude = []  # 跳过这些分类目录
+
+        # 排序配置
+        self.poem_order = 'none'  # 分类内诗词顺序: none(按文件读取顺序), author(作者), title(标题), length(长度)
+        self.sort_memory_mb = 64  # 排序缓冲区内存预算（MB），超出部分写入临时文件
+        self.temp_dir = ''  # 排序临时文件目录（为空则使用系统临时目录）
+
         # 路径配置
         self.poetry_root_dir = '../../'  # 诗词JSON根目录
         self.output_dir = '../data/output'  # 输出目录
@@ -28,45 +48,120 @@ class Settings:
 
         # 文件组织配置
         self.poems_per_file = 1  # 每个文件包含的诗词数量（1=一首一文件）
+        self.max_entries_per_dir = 100  # 每个目录最多容纳的文件/子目录数（含分类索引），超过时自动增加目录层级
+        self.output_encoding = 'utf-8'  # 输出编码: utf-8, gb18030, utf-16le(带BOM)
+        self.output_format = 'txt'  # 输出格式: txt(TXT目录树), book(每个分类一个打包书文件), both(两者都生成)
+        self.book_block_kb = 4  # 书文件数据块大小（KB），每块单独压缩
+
+        # 渲染缓存配置
+        self.render_cache_path = ''  # 持久化渲染缓存文件路径（为空则不启用）
+        self.render_cache_max_mb = 256  # 渲染缓存容量上限（MB）
 
         # 目录配置
         self.enable_catalog = True  # 是否生成目录
         self.catalog_nested = True  # 目录是否嵌套
 
+        # 多输出配置（同一次解析渲染多种设备排版）
+        self.profiles = []  # [{name: 名称, 以及需要覆盖的排版配置项}]
+
     def load_from_file(self, config_file):
         """从配置文件加载设置"""
         try:
             with open(config_file, 'r', encoding='utf-8') as f:
                 config = json.load(f)
 
-            # 页面布局
-            self.lines_per_page = config.get('page_lines', self.lines_per_page)
-            self.chars_per_line = config.get('page_columns', self.chars_per_line)
-
-            # 诗词范围
-            length_range = config.get('poem_length_range', {})
-            self.min_poem_length = length_range.get('min', self.min_poem_length)
-            self.max_poem_length = length_range.get('max', self.max_poem_length)
-
-            # 路径配置
-            self.poetry_root_dir = config.get('input_directory', self.poetry_root_dir)
-            self.output_dir = config.get('output_directory', self.output_dir)
-
-            # 装饰和目录
-            self.enable_decoration = config.get('enable_decoration', self.enable_decoration)
-            self.enable_catalog = config.get('enable_catalog', self.enable_catalog)
-
-            # 文本格式化
-            self.title_separator = config.get('title_separator', self.title_separator)
-            self.text_conversion = config.get('text_conversion', self.text_conversion)
-
-            # 文件组织
-            self.poems_per_file = config.get('poems_per_file', self.poems_per_file)
+            self.load_from_dict(config)
 
             print(f"配置加载成功: 每页{self.lines_per_page}行×{self.chars_per_line}字符")
+            if self.profiles:
+                print(f"  共 {len(self.profiles)} 个输出配置")
         except Exception as e:
             print(f"警告: 配置文件加载失败，使用默认配置: {e}")
 
+    def load_from_dict(self, config):
+        """从配置字典加载设置（不打印任何信息，供库接口使用）
+        Args:
+            config: 与 config.json 结构相同的字典
+        """
+        self._apply_config(config)
+        self.profiles = config.get('profiles', self.profiles)
+
+    def _apply_config(self, config):
+        """将配置字典中的项应用到当前设置
+        Args:
+            config: 配置字典（config.json 的顶层或某个 profile）
+        """
+        # 页面布局
+        self.lines_per_page = config.get('page_lines', self.lines_per_page)
+        self.chars_per_line = config.get('page_columns', self.chars_per_line)
+
+        # 诗词范围
+        length_range = config.get('poem_length_range', {})
+        self.min_poem_length = length_range.get('min', self.min_poem_length)
+        self.max_poem_length = length_range.get('max', self.max_poem_length)
+
+        # 筛选条件
+        poem_filter = config.get('poem_filter', {})
+        self.author_include = poem_filter.get('author_include', self.author_include)
+        self.author_exclude = poem_filter.get('author_exclude', self.author_exclude)
+        self.title_regex = poem_filter.get('title_regex', self.title_regex)
+        self.category_include = poem_filter.get('category_include', self.category_include)
+        self.category_exclude = poem_filter.get('category_exclude', self.category_exclude)
+
+        # 排序
+        self.poem_order = config.get('poem_order', self.poem_order)
+        self.sort_memory_mb = config.get('sort_memory_mb', self.sort_memory_mb)
+        self.temp_dir = config.get('temp_directory', self.temp_dir)
+
+        # 路径配置
+        self.poetry_root_dir = config.get('input_directory', self.poetry_root_dir)
+        self.output_dir = config.get('output_directory', self.output_dir)
+
+        # 装饰和目录
+        self.enable_decoration = config.get('enable_decoration', self.enable_decoration)
+        self.enable_catalog = config.get('enable_catalog', self.enable_catalog)
+        self.catalog_nested = config.get('catalog_nested', self.catalog_nested)
+
+        # 文本格式化
+        self.title_separator = config.get('title_separator', self.title_separator)
+        self.text_conversion = config.get('text_conversion', self.text_conversion)
+
+        # 文件组织
+        self.poems_per_file = config.get('poems_per_file', self.poems_per_file)
+        self.max_entries_per_dir = config.get('max_entries_per_dir', self.max_entries_per_dir)
+        self.output_encoding = config.get('output_encoding', self.output_encoding)
+        self.output_format = config.get('output_format', self.output_format)
+        self.book_block_kb = config.get('book_block_kb', self.book_block_kb)
+
+        # 渲染缓存
+        self.render_cache_path = config.get('render_cache_path', self.render_cache_path)
+        self.render_cache_max_mb = config.get('render_cache_max_mb', self.render_cache_max_mb)
+
+    def get_profile_settings(self):
+        """展开多输出配置
+        未配置 profiles 时只返回自身；否则每个 profile 基于当前设置复制一份并覆盖其中的配置项。
+        未指定 output_directory 的 profile 输出到 output_dir 下以 profile 名称命名的子目录。
+        profile 中出现只能在顶层配置的项（PROFILE_TOP_LEVEL_KEYS）时抛出 ValueError。
+        Returns:
+            list: [(profile名称, Settings)]
+        """
+        if not self.profiles:
+            return [('default', self)]
+
+        result = []
+        for idx, profile in enumerate(self.profiles, 1):
+            name = profile.get('name', f'profile{idx}')
+            top_level_keys = [key for key in PROFILE_TOP_LEVEL_KEYS if key in profile]
+            if top_level_keys:
+                raise ValueError(f"输出配置 {name} 中不能设置 {', '.join(top_level_keys)}："
+                                 f"诗词只按顶层配置解析一次，这些项请写在顶层配置中")
+            profile_settings = copy.copy(self)
+            profile_settings.profiles = []
+            profile_settings.output_dir = os.path.join(self.output_dir, name)
+            profile_settings._apply_config(profile)
+            result.append((name, profile_settings))
+        return result
+
     def save_to_file(self, config_file):
         """保存配置到文件"""
         config = {
@@ -76,13 +171,32 @@ class Settings:
                 'min': self.min_poem_length,
                 'max': self.max_poem_length
             },
+            'poem_filter': {
+                'author_include': self.author_include,
+                'author_exclude': self.author_exclude,
+                'title_regex': self.title_regex,
+                'category_include': self.category_include,
+                'category_exclude': self.category_exclude
+            },
+            'poem_order': self.poem_order,
+            'sort_memory_mb': self.sort_memory_mb,
+            'temp_directory': self.temp_dir,
             'input_directory': self.poetry_root_dir,
             'output_directory': self.output_dir,
             'enable_decoration': self.enable_decoration,
             'enable_catalog': self.enable_catalog,
+            'catalog_nested': self.catalog_nested,
             'title_separator': self.title_separator,
             'text_conversion': self.text_conversion,
-            'poems_per_file': self.poems_per_file
+            'poems_per_file': self.poems_per_file,
+            'max_entries_per_dir': self.max_entries_per_dir,
+            'output_encoding': self.output_encoding,
+            'output_format': self.output_format,
+            'book_block_kb': self.book_block_kb,
+            'render_cache_path': self.render_cache_path,
+            'render_cache_max_mb': self.render_cache_max_mb
         }
+        if self.profiles:
+            config['profiles'] = self.profiles
         with open(config_file, 'w', encoding='utf-8') as f:
             json.dump(config, file=f, ensure_ascii=False, indent=4)
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""东亚字符显示宽度
+
+宽度以半角列为单位：汉字、全角标点、全角空格、制表符等占2列，
+ASCII 数字字母和半角标点占1列，组合附加符号和零宽字符占0列。
+排版中的「每行字符数」按全角字符计，因此一行的宽度是 chars_per_line * 2 列。
+
+东亚宽度为「模糊」(A) 的字符（制表符 ╔、省略号 …、▶ 等）在中文字体下按全角显示，计为2列。
+基本多文种平面 (BMP) 内的宽度预先计算为 bytearray 查表，纯全角或纯 ASCII 的字符串直接按长度计算。
+"""
+import re
+import unicodedata
+
+FULLWIDTH_SPACE = '　'
+HALFWIDTH_SPACE = ' '
+
+# 纯全角字符串的快速判断：制表符/几何图形、CJK 标点、假名、汉字、谚文、全角符号
+_ALL_WIDE = re.compile(
+    '[\u2500-\u25ff\u3000-\u3029\u3030-\u303e\u3041-\u3096\u30a0-\u30ff'
+    '\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7a3\uf900-\ufaff\ufe30-\ufe4f'
+    '\uff01-\uff60\uffe0-\uffe6]*'
+)
+
+_table = None
+
+def _char_width(char):
+    """单个字符的显示宽度（不查表）"""
+    # 制表符和几何图形（╔ ═ ▶ 等）在中文字体中一律按全角显示
+    if '\u2500' <= char <= '\u25ff':
+        return 2
+    if unicodedata.combining(char):
+        return 0
+    category = unicodedata.category(char)
+    if category in ('Cc', 'Cf', 'Mn', 'Me'):
+        return 0
+    if unicodedata.east_asian_width(char) in ('W', 'F', 'A'):
+        return 2
+    return 1
+
+def _build_table():
+    """构建 BMP 宽度表（首次使用时构建一次）"""
+    global _table
+    if _table is None:
+        table = bytearray(0x10000)
+        for code in range(0x10000):
+            if 0xD800 <= code <= 0xDFFF:
+                table[code] = 1
+            else:
+                table[code] = _char_width(chr(code))
+        _table = table
+    return _table
+
+def text_width(text):
+    """计算文本显示宽度（半角列数）"""
+    # 纯 ASCII（其中只有控制字符为0宽，排版文本中不会出现）或纯全角时直接按长度计算
+    char_width = uniform_char_width(text)
+    if char_width is not None:
+        return len(text) * char_width
+
+    table = _table or _build_table()
+    width = 0
+    for char in text:
+        code = ord(char)
+        width += table[code] if code < 0x10000 else _char_width(char)
+    return width
+
+def uniform_char_width(text):
+    """整段文本中每个字符的统一宽度
+    用于按段落判断一次，之后对其中的片段直接按 len * 宽度计算，不再逐段查表。
+    Returns:
+        int: 纯 ASCII 返回1，纯全角返回2，混合文本返回 None
+    """
+    if text.isascii():
+        return 1
+    if _ALL_WIDE.fullmatch(text):
+        return 2
+    return None
+
+def truncate_to_width(text, max_width):
+    """按显示宽度截断文本（单遍扫描，未超宽时不重复计算宽度）
+    Args:
+        text: 文本
+        max_width: 最大宽度（半角列数）
+    Returns:
+        tuple: (截断后的文本, 实际宽度)
+    """
+    char_width = uniform_char_width(text)
+    if char_width is not None:
+        count = min(len(text), max_width // char_width)
+        return text[:count], count * char_width
+
+    table = _table or _build_table()
+    width = 0
+    for idx, char in enumerate(text):
+        code = ord(char)
+        char_width = table[code] if code < 0x10000 else _char_width(char)
+        if width + char_width > max_width:
+            return text[:idx], width
+        width += char_width
+    return text, width
+
+def fill_width(width):
+    """用全角空格填充指定宽度，奇数宽度补一个半角空格"""
+    return FULLWIDTH_SPACE * (width // 2) + (HALFWIDTH_SPACE if width % 2 else '')
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""排版基础元素
+
+页面、分类索引和总目录共用的全角数字、填充、边框和居中文本。
+填充和边框按 (宽度, 样式) 缓存，重复出现的标签（页码、作者、分类名等）按内容缓存。
+宽度参数均按全角字符计，文本宽度按显示宽度计算（见 display_width）。
+"""
+from functools import lru_cache
+from formatter.display_width import fill_width, text_width, truncate_to_width
+
+FULLWIDTH_SPACE = '　'
+
+# 半角数字 -> 全角数字（只构建一次）
+FULLWIDTH_DIGITS = str.maketrans('0123456789', '０１２３４５６７８９')
+
+# 边框样式 -> 位置 -> (左角, 右角)
+BORDER_CORNERS = {
+    'double': {'top': ('╔', '╗'), 'bottom': ('╚', '╝'), 'separator': ('╠', '╣')},
+    'single': {'top': ('┌', '┐'), 'bottom': ('└', '┘'), 'separator': ('├', '┤')},
+}
+PLAIN_CORNERS = ('+', '+')
+
+def to_fullwidth_number(num):
+    """将数字（或含数字的字符串）转换为全角数字"""
+    return str(num).translate(FULLWIDTH_DIGITS)
+
+@lru_cache(maxsize=None)
+def padding(count):
+    """指定数量的全角空格"""
+    return FULLWIDTH_SPACE * count if count > 0 else ''
+
+@lru_cache(maxsize=None)
+def rule_line(char, width):
+    """由单个字符重复构成的整行（如 ═══）"""
+    return char * width
+
+def corners(style, position):
+    """取边框的左右角字符
+    Args:
+        style: 边框样式 double/single/其他
+        position: top/bottom/separator
+    Returns:
+        tuple: (左角, 右角)
+    """
+    return BORDER_CORNERS.get(style, {}).get(position, PLAIN_CORNERS)
+
+@lru_cache(maxsize=8192)
+def framed_line(left, right, width, text=''):
+    """生成两端为边框角、中间居中显示文本的行（向左偏）
+    总宽度为 width，中间可用 width-2 个全角字符，文本过宽时截断；
+    含半角字符时剩余的半个全角位用半角空格补齐，保证右侧边框对齐。
+    Args:
+        left: 左角字符
+        right: 右角字符
+        width: 总宽度（全角字符数）
+        text: 中间显示的文本（可为空）
+    Returns:
+        str: 边框行
+    """
+    middle_chars = width - 2
+    if not text:
+        return left + padding(middle_chars) + right
+
+    capacity = middle_chars * 2
+    text, text_columns = truncate_to_width(text, capacity)
+    free_columns = capacity - text_columns
+    left_padding = free_columns // 4
+    return left + padding(left_padding) + text + fill_width(free_columns - left_padding * 2) + right
+
+def border_line(style, position, width, text=''):
+    """按边框样式生成边框行（见 framed_line）"""
+    left, right = corners(style, position)
+    return framed_line(left, right, width, text)
+
+@lru_cache(maxsize=4096)
+def center_line(text, width):
+    """文本居中（只在左侧填充，向左偏），过宽时截断到 width 个全角字符"""
+    capacity = width * 2
+    text_columns = text_width(text)
+    if text_columns >= capacity:
+        return truncate_to_width(text, capacity)[0]
+    return padding((capacity - text_columns) // 4) + text
+
+def truncate_line(text, width):
+    """按显示宽度截断到 width 个全角字符"""
+    return truncate_to_width(text, width * 2)[0]
+
+@lru_cache(maxsize=4096)
+def page_label(page_num, total_pages):
+    """页码标签，如 第１／３页"""
+    return f'第{to_fullwidth_number(page_num)}／{to_fullwidth_number(total_pages)}页'
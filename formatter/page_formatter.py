@@ -1,20 +1,57 @@
 # -*- coding: utf-8 -*-
+from collections import OrderedDict
+from formatter.display_width import text_width, truncate_to_width, uniform_char_width
+from formatter.layout_primitives import border_line, center_line, padding, page_label, rule_line, truncate_line
+
+# 底部「下一首」提示符和截断省略号（宽度只计算一次）
+NEXT_PREFIX = '▶'
+NEXT_PREFIX_WIDTH = text_width(NEXT_PREFIX)
+ELLIPSIS_WIDTH = text_width('…')
+
+class WrapCache:
+    """换行结果的LRU缓存 {段落文本: (行列表, 行宽列表)}，按条目数限制容量
+
+    行宽相同的多个输出配置共享；全量语料的段落远多于容量时只保留最近使用的部分，
+    内存占用不随语料增长（诗词本身可以按 SpilledPoemList 留在磁盘上）。
+    """
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, text):
+        wrapped = self._entries.get(text)
+        if wrapped is not None:
+            self._entries.move_to_end(text)
+        return wrapped
+
+    def put(self, text, wrapped):
+        self._entries[text] = wrapped
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
 
 class PageFormatter:
     """诗词页面格式化器，支持智能分页和装饰"""
 
-    def __init__(self, settings):
+    # 排版逻辑版本：修改排版规则导致输出变化时递增，使渲染缓存中的旧结果失效
+    RENDER_VERSION = 2
+
+    def __init__(self, settings, wrap_cache=None):
+        """初始化
+        Args:
+            settings: 配置
+            wrap_cache: 换行结果缓存 WrapCache（可选），行宽相同的多个格式化器可共享同一个缓存
+        """
         self.settings = settings
         self.lines_per_page = settings.lines_per_page
-        # chars_per_line 直接表示每行字符数（全部为中文/全角字符）
+        # chars_per_line 表示每行全角字符数；行宽按显示宽度计算，半角字符占半个全角位
         self.chars_per_line = settings.chars_per_line
-
-    def _to_fullwidth_number(self, num):
-        """将数字转换为全角数字"""
-        halfwidth = '0123456789'
-        fullwidth = '０１２３４５６７８９'
-        trans = str.maketrans(halfwidth, fullwidth)
-        return str(num).translate(trans)
+        self.line_width = settings.chars_per_line * 2  # 行宽（半角列数）
+        self.wrap_cache = wrap_cache
 
     def format_poem(self, poem, next_poem=None):
         """格式化单首诗词
@@ -38,6 +75,76 @@ class PageFormatter:
 
         return pages
 
+    def format_index(self, title, subtitle, entries):
+        """将目录条目排成与诗词页面相同行数和宽度的页面
+        每页顶部为标题和副标题、底部为页码，条目从上往下排列，不足一页时用空行补齐。
+        一个条目的多行尽量排在同一页，条目本身超过一页时才跨页；过宽的行按显示宽度截断。
+        Args:
+            title: 标题（如分类名）
+            subtitle: 副标题（如诗词范围）
+            entries: 条目列表，每个条目是若干行文本
+        Returns:
+            list: 页面列表，每个页面是字符串
+        """
+        body_lines = self.lines_per_page - 3  # 顶部2行和底部1行
+        page_bodies = [[]]
+        for entry in entries:
+            current = page_bodies[-1]
+            if current and len(current) + len(entry) > body_lines:
+                current = []
+                page_bodies.append(current)
+            for line in entry:
+                if len(current) >= body_lines:
+                    current = []
+                    page_bodies.append(current)
+                current.append(truncate_line(line, self.chars_per_line))
+
+        pages = []
+        total_pages = len(page_bodies)
+        for page_num, body in enumerate(page_bodies, 1):
+            if self.settings.enable_decoration:
+                result_lines = [self._make_border('top', title), self._make_separator(subtitle)]
+            else:
+                result_lines = [center_line(f'{title}　{subtitle}', self.chars_per_line),
+                                rule_line('═', self.chars_per_line)]
+            result_lines.extend(body)
+            for _ in range(body_lines - len(body)):
+                result_lines.append(self._make_empty_line())
+            if self.settings.enable_decoration:
+                result_lines.append(self._make_border('bottom', page_label(page_num, total_pages)))
+            else:
+                result_lines.append(center_line(page_label(page_num, total_pages), self.chars_per_line))
+            pages.append('\n'.join(result_lines))
+        return pages
+
+    def measure_poem(self, poem):
+        """统计诗词的正文行数、页数和超宽行数，换行与分页规则与 format_poem 一致，但不生成页面
+        Args:
+            poem: 诗词
+        Returns:
+            tuple: (正文行数, 页数, 超宽行数)
+        """
+        line_count = 0
+        overlong = 0
+        trailing_empty = 0
+        for paragraph in poem['paragraphs']:
+            lines, widths = self._wrap_text_cached(paragraph)
+            for line, width in zip(lines, widths):
+                line_count += 1
+                if line == '':
+                    trailing_empty += 1
+                    continue
+                trailing_empty = 0
+                # 无逗号可断的长句会超出行宽
+                if width > self.line_width:
+                    overlong += 1
+
+        # 与 _build_content 一致：末尾空行不计入
+        line_count -= trailing_empty
+        lines_per_chunk = self.lines_per_page - 3
+        page_count = (line_count + lines_per_chunk - 1) // lines_per_chunk
+        return line_count, page_count, overlong
+
     def _build_header(self, poem):
         """构建诗词标题区"""
         lines = []
@@ -50,40 +157,64 @@ class PageFormatter:
     def _build_content(self, poem):
         """构建诗词内容"""
         all_lines = []
+        all_widths = []
 
         for i, paragraph in enumerate(poem['paragraphs']):
-            # 处理每一段，自动换行
-            para_lines = self._wrap_text(paragraph)
+            # 处理每一段，自动换行（行宽由换行时一并算出，不再逐行重新测量）
+            para_lines, para_widths = self._wrap_text_cached(paragraph)
             all_lines.extend(para_lines)
+            all_widths.extend(para_widths)
 
         # 移除末尾多余空行
         while all_lines and all_lines[-1] == '':
             all_lines.pop()
 
-        # 找出最长的行
-        max_len = max(len(line) for line in all_lines) if all_lines else 0
+        # 找出最宽的行（空行宽度为0，不影响结果）
+        max_width = max(all_widths) if all_lines else 0
 
-        # 计算最长行的居中位置（向左偏）
-        if max_len < self.chars_per_line:
-            left_padding = (self.chars_per_line - max_len) // 2
+        # 计算最宽行的居中位置（向左偏，按全角空格填充）
+        if max_width < self.line_width:
+            left_padding = (self.line_width - max_width) // 4
         else:
             left_padding = 0
 
         # 所有行都从相同位置开始（左对齐），实现最长句居中，短句与长句左对齐
-        centered_lines = []
-        for line in all_lines:
-            centered_line = '　' * left_padding + line
-            centered_lines.append(centered_line)
+        indent = padding(left_padding)
+        centered_lines = [indent + line for line in all_lines]
 
         return centered_lines
 
+    def _wrap_text_cached(self, text):
+        """自动换行，结果与行宽相关，命中共享缓存时直接复用"""
+        if self.wrap_cache is None:
+            return self._wrap_text(text)
+
+        wrapped = self.wrap_cache.get(text)
+        if wrapped is None:
+            wrapped = self._wrap_text(text)
+            self.wrap_cache.put(text, wrapped)
+        return wrapped
+
     def _wrap_text(self, text):
-        """文本自动换行，支持逗号分隔的长句子智能分行"""
+        """文本自动换行，支持逗号分隔的长句子智能分行
+        Returns:
+            tuple: (行列表, 各行显示宽度列表)
+        """
         lines = []
+        widths = []
+
+        # 整段只判断一次字符宽度：纯全角/纯ASCII的段落按长度计算，混合文本才逐段测量
+        char_width = uniform_char_width(text)
+
+        # 整段放得下一行时结果就是原文（开头逗号和连续逗号会被拆分规则去掉，需走常规流程）
+        if char_width is not None and len(text) * char_width <= self.line_width \
+                and not text.startswith('，') and '，，' not in text:
+            return [text], [len(text) * char_width]
 
         # 首先按逗号分割，将较长的段落拆分成小句
         parts = text.split('，')
         current_line = ''
+        current_width = 0
 
         for i, part in enumerate(parts):
             if not part:
@@ -92,25 +223,33 @@ class PageFormatter:
             # 如果不是最后一部分，添加回逗号
             part_with_comma = part + '，' if i < len(parts) - 1 else part
 
-            # 计算添加此部分后的长度
-            potential_line = current_line + part_with_comma
+            # 计算添加此部分后的显示宽度
+            if char_width is not None:
+                part_width = len(part_with_comma) * char_width
+            else:
+                part_width = text_width(part_with_comma)
 
             # 如果当前行为空，直接添加（即使超长也要添加）
             if not current_line:
                 current_line = part_with_comma
+                current_width = part_width
             # 如果加上这部分会超长，先输出当前行，再开始新行
-            elif len(potential_line) > self.chars_per_line:
+            elif current_width + part_width > self.line_width:
                 lines.append(current_line)
+                widths.append(current_width)
                 current_line = part_with_comma
+                current_width = part_width
             # 否则继续追加到当前行
             else:
-                current_line = potential_line
+                current_line += part_with_comma
+                current_width += part_width
 
         # 处理最后一行
         if current_line:
             lines.append(current_line)
+            widths.append(current_width)
 
-        return lines if lines else ['']
+        return (lines, widths) if lines else ([''], [0])
 
     def _split_into_pages(self, lines, poem, next_poem=None):
         """将行列表分割成页面"""
@@ -182,117 +321,48 @@ class PageFormatter:
             # 如果只有1页且有下一首诗，显示下一首标题
             if total_pages == 1 and next_poem:
                 next_title = next_poem['title']
-                # 计算可用空间（chars_per_line - 2个边框字符）
-                available_width = self.chars_per_line - 2
+                # 计算可用宽度（chars_per_line - 2个边框字符，按半角列计）
+                available_width = (self.chars_per_line - 2) * 2
 
                 # 使用简洁的提示符 "▶" 节省空间
-                prefix = '▶'
-                prefix_len = len(prefix)
+                prefix = NEXT_PREFIX
+                prefix_width = NEXT_PREFIX_WIDTH
 
-                # 如果标题太长，智能截断并加省略号
-                if prefix_len + len(next_title) > available_width:
-                    max_title_len = available_width - prefix_len - 1  # 留一个字符给可能的省略号
-                    if max_title_len > 0:
-                        next_title = next_title[:max_title_len] + '…'
+                # 如果标题太宽，按显示宽度截断并加省略号
+                if prefix_width + text_width(next_title) > available_width:
+                    max_title_width = available_width - prefix_width - ELLIPSIS_WIDTH  # 留出省略号的宽度
+                    if max_title_width > 0:
+                        next_title = truncate_to_width(next_title, max_title_width)[0] + '…'
 
                 next_info = prefix + next_title
                 result_lines.append(self._make_border('bottom', next_info))
             else:
                 # 否则显示页码
-                page_info = f'第{self._to_fullwidth_number(page_num)}／{self._to_fullwidth_number(total_pages)}页'
+                page_info = page_label(page_num, total_pages)
                 result_lines.append(self._make_border('bottom', page_info))
 
         return '\n'.join(result_lines)
 
     def _center_text(self, text):
-        """文本居中"""
-        text_len = self._display_width(text)
-        if text_len >= self.display_width:
-            return text[:self.chars_per_line]
-
-        padding = (self.display_width - text_len) // 2
-        return '　' * padding + text
+        """文本居中（按显示宽度，过宽时截断）"""
+        return center_line(text, self.chars_per_line)
 
     def _pad_line(self, text):
         """不填充行，直接返回原文本"""
         return text
 
     def _display_width(self, text):
-        """计算显示宽度（全部为中文/全角字符，直接返回字符数）"""
-        return len(text)
+        """计算显示宽度（半角列数，全角字符占2列）"""
+        return text_width(text)
 
     def _make_border(self, position='top', info_text=''):
-        """生成边框，仅在四角显示制表符，中间可显示信息"""
-        if self.settings.border_style == 'double':
-            if position == 'top':
-                corner_left = '╔'
-                corner_right = '╗'
-            else:
-                corner_left = '╚'
-                corner_right = '╝'
-        elif self.settings.border_style == 'single':
-            if position == 'top':
-                corner_left = '┌'
-                corner_right = '┐'
-            else:
-                corner_left = '└'
-                corner_right = '┘'
-        else:
-            corner_left = '+'
-            corner_right = '+'
-
-        # 总字符数 = chars_per_line
-        # 左角(1) + 中间内容 + 右角(1) = chars_per_line
-        # 中间内容字符数 = chars_per_line - 2
-
-        middle_chars = self.chars_per_line - 2
-
-        if info_text:
-            # 显示信息文本（居中）
-            info_len = len(info_text)
-            if info_len <= middle_chars:
-                left_padding = (middle_chars - info_len) // 2
-                right_padding = middle_chars - info_len - left_padding
-                middle = '　' * left_padding + info_text + '　' * right_padding
-            else:
-                # 信息太长，截断
-                middle = info_text[:middle_chars]
-        else:
-            # 使用全角空格填充
-            middle = '　' * middle_chars
-
-        return corner_left + middle + corner_right
+        """生成边框，仅在四角显示制表符，中间可显示居中信息（过长时截断）"""
+        return border_line(self.settings.border_style, position, self.chars_per_line, info_text)
 
     def _make_separator(self, info_text=''):
         """生成分隔线，只显示四角，可选显示居中文本"""
-        if self.settings.border_style == 'double':
-            corner_left = '╠'
-            corner_right = '╣'
-        elif self.settings.border_style == 'single':
-            corner_left = '├'
-            corner_right = '┤'
-        else:
-            corner_left = '+'
-            corner_right = '+'
-
-        middle_chars = self.chars_per_line - 2
-
-        if info_text:
-            # 显示居中文本（向左偏）
-            info_len = len(info_text)
-            if info_len <= middle_chars:
-                left_padding = (middle_chars - info_len) // 2
-                right_padding = middle_chars - info_len - left_padding
-                middle = '　' * left_padding + info_text + '　' * right_padding
-            else:
-                # 信息太长，截断
-                middle = info_text[:middle_chars]
-        else:
-            # 中间使用全角空格填充
-            middle = '　' * middle_chars
-
-        return corner_left + middle + corner_right
+        return border_line(self.settings.border_style, 'separator', self.chars_per_line, info_text)
 
     def _make_empty_line(self):
         """生成空行（使用全角空格）"""
-        return '　' * self.chars_per_line
+        return padding(self.chars_per_line)
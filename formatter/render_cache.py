@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import os
+import sqlite3
+
+class RenderCache:
+    """持久化的页面渲染缓存（SQLite）
+
+    以内容寻址：键由规范化后的诗词内容、排版参数、底部「▶」提示的下一首标题
+    和格式化器版本共同计算，诗词没有变化时跨次生成直接复用已渲染的页面。
+    超过容量上限时按最近使用的生成批次淘汰。
+    """
+
+    def __init__(self, db_path, max_bytes=256 * 1024 * 1024):
+        """初始化
+        Args:
+            db_path: 缓存数据库文件路径
+            max_bytes: 缓存内容的容量上限（字节）
+        """
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            'key TEXT PRIMARY KEY, pages TEXT NOT NULL, size INTEGER NOT NULL, last_used INTEGER NOT NULL)'
+        )
+        self.conn.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+
+        # 每次打开缓存视为一个新的生成批次，用于按最近使用淘汰
+        row = self.conn.execute("SELECT value FROM meta WHERE name = 'generation'").fetchone()
+        self.generation = (row[0] if row else 0) + 1
+        self.conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('generation', ?)", (self.generation,))
+        self.conn.commit()
+
+        self._pending_writes = []
+        self._used_keys = set()
+
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    @staticmethod
+    def make_key(poem, settings, next_poem=None, version=1):
+        """计算缓存键
+        Args:
+            poem: 诗词
+            settings: 排版配置
+            next_poem: 下一首诗词（影响底部提示）
+            version: 格式化器版本，排版逻辑变化时使旧缓存失效
+        Returns:
+            str: 缓存键
+        """
+        material = [
+            version,
+            poem['title'], poem['author'], poem['paragraphs'],
+            settings.lines_per_page, settings.chars_per_line,
+            settings.enable_decoration, settings.border_style,
+            next_poem['title'] if next_poem else None,
+        ]
+        data = json.dumps(material, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+    def get(self, key):
+        """查找缓存
+        Returns:
+            list: 页面列表，未命中时返回 None
+        """
+        row = self.conn.execute('SELECT pages FROM pages WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._used_keys.add(key)
+        return json.loads(row[0])
+
+    def render(self, formatter, poem, next_poem=None):
+        """取缓存的页面，未命中时用格式化器渲染并写入缓存
+        Args:
+            formatter: PageFormatter
+            poem: 诗词
+            next_poem: 下一首诗词（影响底部提示）
+        Returns:
+            list: 页面列表
+        """
+        key = self.make_key(poem, formatter.settings, next_poem, formatter.RENDER_VERSION)
+        pages = self.get(key)
+        if pages is None:
+            pages = formatter.format_poem(poem, next_poem)
+            self.put(key, pages)
+        return pages
+
+    def put(self, key, pages):
+        """写入缓存（批量提交）"""
+        data = json.dumps(pages, ensure_ascii=False)
+        self._pending_writes.append((key, data, len(data.encode('utf-8')), self.generation))
+        self._used_keys.discard(key)
+        if len(self._pending_writes) >= 1000:
+            self._flush_writes()
+
+    def _flush_writes(self):
+        if self._pending_writes:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO pages (key, pages, size, last_used) VALUES (?, ?, ?, ?)',
+                self._pending_writes
+            )
+            self.conn.commit()
+            self._pending_writes = []
+
+    def total_bytes(self):
+        """缓存内容总大小（字节）"""
+        row = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()
+        return row[0]
+
+    def flush(self):
+        """提交待写入内容、更新命中条目的使用批次，并按容量上限淘汰"""
+        self._flush_writes()
+
+        if self._used_keys:
+            self.conn.executemany(
+                'UPDATE pages SET last_used = ? WHERE key = ?',
+                [(self.generation, key) for key in self._used_keys]
+            )
+            self._used_keys = set()
+
+        excess = self.total_bytes() - self.max_bytes
+        if excess > 0:
+            doomed = []
+            for key, size in self.conn.execute('SELECT key, size FROM pages ORDER BY last_used ASC'):
+                doomed.append((key,))
+                excess -= size
+                if excess <= 0:
+                    break
+            self.conn.executemany('DELETE FROM pages WHERE key = ?', doomed)
+            self.evicted += len(doomed)
+        self.conn.commit()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def stats(self):
+        """命中统计
+        Returns:
+            dict: {hits, misses, hit_rate, evicted, bytes}
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evicted': self.evicted,
+            'bytes': self.total_bytes(),
+        }
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""打包书文件格式 (.pbk)
+
+每个分类一个文件，由 PageFormatter 的页面组成，设备打开后可用一次小读取解码任意一页。
+
+文件布局（所有整数均为小端）::
+
+    文件头        HEADER（固定 68 字节）
+    数据块        页面文本（UTF-8）按顺序装入数据块，每块解压后不超过 block_size 字节，
+                  页面不跨块（单页超过 block_size 时独占一块），每块单独压缩
+    字符串表      分类名（位于偏移0）、各诗词的标题和作者（UTF-8，无分隔符）
+    诗词表        每首诗 6 个 uint32: 首页序号, 页数, 标题偏移, 标题长度, 作者偏移, 作者长度
+    页表          每页 3 个 uint32: 所在块序号, 块内偏移, 字节长度
+    块表          每块 2 个 uint64: 文件偏移, 压缩后长度
+
+读取第 n 页：页表第 n 项 -> 块表第 block 项 -> 读取并解压该块 -> 按块内偏移和长度截取。
+页表和块表为定长记录，可以直接按偏移读取，也可以打开时整体载入内存。
+"""
+import os
+import struct
+import sys
+import zlib
+from array import array
+from collections import OrderedDict
+from generator.output_encoding import PARTIAL_SUFFIX
+
+MAGIC = b'PBK\x1a'
+FORMAT_VERSION = 1
+BOOK_EXTENSION = '.pbk'
+
+# 压缩方式
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSIONS = {'none': COMPRESSION_NONE, 'zlib': COMPRESSION_ZLIB}
+
+# magic, 版本, 压缩方式, 保留, 块大小, 诗词数, 页数, 块数, 分类名长度,
+# 字符串表偏移, 字符串表长度, 诗词表偏移, 页表偏移, 块表偏移
+HEADER = struct.Struct('<4sHBBIIIIIQQQQQ')
+POEM_FIELDS = 6
+PAGE_FIELDS = 3
+BLOCK_FIELDS = 2
+
+DEFAULT_BLOCK_SIZE = 4 * 1024
+
+def _to_little_endian(values):
+    """数组按小端写出（大端平台上先交换字节序）"""
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def _from_little_endian(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+class BookWriter:
+    """书文件写入器
+
+    页面边写边装块，数据块写满即压缩落盘；内存中只保留字符串表和定长的诗词/页/块表。
+    """
+
+    def __init__(self, path, category, block_size=DEFAULT_BLOCK_SIZE, compression='zlib'):
+        """初始化
+        Args:
+            path: 书文件路径
+            category: 分类名
+            block_size: 数据块解压后的大小上限（字节）
+            compression: 压缩方式 zlib/none
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"不支持的压缩方式: {compression}，可选: {', '.join(COMPRESSIONS)}")
+        self.path = path
+        self.block_size = block_size
+        self.compression = COMPRESSIONS[compression]
+
+        self.strings = bytearray(category.encode('utf-8'))
+        self.category_length = len(self.strings)
+        self.poem_table = array('I')
+        self.page_table = array('I')
+        self.block_table = array('Q')
+
+        self._block = bytearray()
+        self._page_count = 0
+        # 先写入临时文件，完成后原子替换，中断时不会留下不完整的书文件
+        self._tmp_path = path + PARTIAL_SUFFIX
+        self._file = open(self._tmp_path, 'wb')
+        self._file.write(b'\0' * HEADER.size)  # 文件头最后回填
+
+    def _add_string(self, text):
+        data = text.encode('utf-8')
+        offset = len(self.strings)
+        self.strings += data
+        return offset, len(data)
+
+    def _flush_block(self):
+        if not self._block:
+            return
+        data = bytes(self._block)
+        if self.compression == COMPRESSION_ZLIB:
+            data = zlib.compress(data, 6)
+        self.block_table.append(self._file.tell())
+        self.block_table.append(len(data))
+        self._file.write(data)
+        self._block = bytearray()
+
+    def add_poem(self, title, author, pages):
+        """追加一首诗词
+        Args:
+            title: 标题
+            author: 作者
+            pages: 页面列表（PageFormatter.format_poem 的结果）
+        """
+        title_offset, title_length = self._add_string(title)
+        author_offset, author_length = self._add_string(author)
+        self.poem_table.extend((self._page_count, len(pages), title_offset, title_length, author_offset, author_length))
+
+        for page in pages:
+            data = page.encode('utf-8')
+            # 页面不跨块：当前块放不下时先落盘
+            if self._block and len(self._block) + len(data) > self.block_size:
+                self._flush_block()
+            block_index = len(self.block_table) // BLOCK_FIELDS
+            self.page_table.extend((block_index, len(self._block), len(data)))
+            self._block += data
+            self._page_count += 1
+
+    def close(self):
+        """写出剩余数据块、各表和文件头"""
+        if self._file.closed:
+            return
+        self._flush_block()
+        f = self._file
+
+        strings_offset = f.tell()
+        f.write(self.strings)
+        poem_table_offset = f.tell()
+        f.write(_to_little_endian(self.poem_table))
+        page_table_offset = f.tell()
+        f.write(_to_little_endian(self.page_table))
+        block_table_offset = f.tell()
+        f.write(_to_little_endian(self.block_table))
+
+        f.seek(0)
+        f.write(HEADER.pack(
+            MAGIC, FORMAT_VERSION, self.compression, 0, self.block_size,
+            len(self.poem_table) // POEM_FIELDS, self._page_count, len(self.block_table) // BLOCK_FIELDS,
+            self.category_length, strings_offset, len(self.strings),
+            poem_table_offset, page_table_offset, block_table_offset,
+        ))
+        f.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """放弃写入并删除临时文件"""
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class BookReader:
+    """书文件读取器（纯 Python）
+
+    打开时载入文件头、分类名、页表和块表，之后读取任意一页只需一次块读取；
+    字符串表和诗词表在第一次查询诗词信息时才载入。
+    最近解压的数据块按 LRU 缓存，顺序翻页时同一块只解压一次。
+    """
+
+    def __init__(self, path, block_cache_size=4):
+        """初始化
+        Args:
+            path: 书文件路径
+            block_cache_size: 缓存的已解压数据块数量
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        header = self._file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            self._file.close()
+            raise ValueError(f"不是有效的书文件: {path}")
+
+        (magic, version, self.compression, _, self.block_size,
+         self.poem_count, self.page_count, self.block_count, category_length,
+         strings_offset, strings_size, poem_table_offset, page_table_offset,
+         block_table_offset) = HEADER.unpack(header)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._file.close()
+            raise ValueError(f"不是有效的书文件或版本不支持: {path}")
+
+        self.category = self._read_at(strings_offset, category_length).decode('utf-8')
+        self._strings_range = (strings_offset, strings_size)
+        self._poem_table_offset = poem_table_offset
+        self.strings = None
+        self.poem_table = None
+        self.page_table = _from_little_endian('I', self._read_at(page_table_offset, self.page_count * PAGE_FIELDS * 4))
+        self.block_table = _from_little_endian('Q', self._read_at(block_table_offset, self.block_count * BLOCK_FIELDS * 8))
+
+        self.block_cache_size = block_cache_size
+        self._blocks = OrderedDict()
+
+    def _read_at(self, offset, size):
+        self._file.seek(offset)
+        return self._file.read(size)
+
+    def _load_poem_table(self):
+        if self.poem_table is None:
+            self.strings = self._read_at(*self._strings_range)
+            self.poem_table = _from_little_endian(
+                'I', self._read_at(self._poem_table_offset, self.poem_count * POEM_FIELDS * 4))
+
+    def _string(self, offset, length):
+        return self.strings[offset:offset + length].decode('utf-8')
+
+    def _block(self, block_index):
+        """读取并解压数据块（带 LRU 缓存）"""
+        data = self._blocks.get(block_index)
+        if data is not None:
+            self._blocks.move_to_end(block_index)
+            return data
+
+        base = block_index * BLOCK_FIELDS
+        data = self._read_at(self.block_table[base], self.block_table[base + 1])
+        if self.compression == COMPRESSION_ZLIB:
+            data = zlib.decompress(data)
+
+        self._blocks[block_index] = data
+        if len(self._blocks) > self.block_cache_size:
+            self._blocks.popitem(last=False)
+        return data
+
+    def __len__(self):
+        return self.page_count
+
+    def page(self, page_index):
+        """读取第 page_index 页（从0开始，全书统一编号）"""
+        if not 0 <= page_index < self.page_count:
+            raise IndexError(f"页码超出范围: {page_index}")
+        base = page_index * PAGE_FIELDS
+        block_index, offset, length = self.page_table[base:base + PAGE_FIELDS]
+        return self._block(block_index)[offset:offset + length].decode('utf-8')
+
+    def poem(self, poem_index):
+        """诗词信息
+        Returns:
+            dict: {title, author, first_page, page_count}
+        """
+        if not 0 <= poem_index < self.poem_count:
+            raise IndexError(f"诗词序号超出范围: {poem_index}")
+        self._load_poem_table()
+        base = poem_index * POEM_FIELDS
+        first_page, page_count, title_offset, title_length, author_offset, author_length = \
+            self.poem_table[base:base + POEM_FIELDS]
+        return {
+            'title': self._string(title_offset, title_length),
+            'author': self._string(author_offset, author_length),
+            'first_page': first_page,
+            'page_count': page_count,
+        }
+
+    def poem_pages(self, poem_index):
+        """诗词的全部页面"""
+        info = self.poem(poem_index)
+        return [self.page(idx) for idx in range(info['first_page'], info['first_page'] + info['page_count'])]
+
+    def close(self):
+        self._file.close()
+        self._blocks.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def book_path(output_dir, category):
+    """分类对应的书文件路径"""
+    return os.path.join(output_dir, category + BOOK_EXTENSION)
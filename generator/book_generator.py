@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import os
+from generator.book_format import BookWriter, book_path
+
+class BookGenerator:
+    """打包书文件生成器（每个分类一个 .pbk 文件）"""
+
+    def __init__(self, settings, formatter, render_cache=None):
+        """初始化
+        Args:
+            settings: 配置
+            formatter: 页面格式化器
+            render_cache: 持久化渲染缓存 RenderCache（可选）
+        """
+        self.settings = settings
+        self.formatter = formatter
+        self.render_cache = render_cache
+        self.block_size = settings.book_block_kb * 1024
+
+    def generate_all(self, poems_by_category):
+        """生成所有书文件
+        Args:
+            poems_by_category: {分类名: [诗词列表]}
+        Returns:
+            dict: {分类名: 书文件路径}
+        """
+        output_dir = os.path.abspath(self.settings.output_dir)
+        os.makedirs(output_dir, exist_ok=True)
+
+        books = {}
+        print(f"\n开始生成书文件，共 {len(poems_by_category)} 个分类")
+        for category, poems in sorted(poems_by_category.items()):
+            if not poems:
+                continue
+            path = book_path(output_dir, category)
+            page_count = self._generate_book(category, poems, path)
+            books[category] = path
+            print(f"  {os.path.basename(path)}: {len(poems)} 首，{page_count} 页，"
+                  f"{os.path.getsize(path) / 1024:.1f} KB")
+        return books
+
+    def _generate_book(self, category, poems, path):
+        """生成单个分类的书文件
+        Returns:
+            int: 总页数
+        """
+        page_count = 0
+        with BookWriter(path, category, self.block_size) as writer:
+            # 底部「▶」提示指向分类内的下一首
+            poem_iter = iter(poems)
+            poem = next(poem_iter, None)
+            while poem is not None:
+                next_poem = next(poem_iter, None)
+                pages = self._format_poem(poem, next_poem)
+                writer.add_poem(poem['title'], poem['author'], pages)
+                page_count += len(pages)
+                poem = next_poem
+        return page_count
+
+    def _format_poem(self, poem, next_poem=None):
+        """格式化诗词，启用渲染缓存时优先复用缓存结果"""
+        if self.render_cache is None:
+            return self.formatter.format_poem(poem, next_poem)
+        return self.render_cache.render(self.formatter, poem, next_poem)
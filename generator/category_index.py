@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+class CategoryIndex:
+    """分类索引（生成诗词文件时顺带收集条目）
+
+    按叶子目录分组收集每个文件中诗词的标题和作者，一组的最后一个文件生成后即可排版输出该组的目录，
+    随后释放条目；总目录只需要各分类的诗词数和分层方案，不必再遍历诗词列表。
+    """
+
+    def __init__(self, category, poem_count, plan):
+        """初始化
+        Args:
+            category: 分类名
+            poem_count: 分类中的诗词数
+            plan: 目录分层方案 DirectoryPlan
+        """
+        self.category = category
+        self.poem_count = poem_count
+        self.plan = plan
+        self._groups = plan.leaf_groups()
+        self._group_idx = 0
+        self._files = []
+
+    def add_file(self, unit_idx, start_poem_idx, poems):
+        """记录一个诗词文件
+        Args:
+            unit_idx: 文件（单元）序号，从0开始
+            start_poem_idx: 文件中第一首诗的序号，从1开始
+            poems: 文件中的诗词
+        Returns:
+            tuple: 该文件是所在叶子目录的最后一个文件时返回
+                   (叶子目录, 起始诗词序号, 结束诗词序号, [(起始序号, [(标题, 作者)])])，否则返回 None
+        """
+        self._files.append((start_poem_idx, [(poem['title'], poem['author']) for poem in poems]))
+
+        leaf_dir, first_unit, last_unit = self._groups[self._group_idx]
+        if unit_idx + 1 < last_unit:
+            return None
+
+        files = self._files
+        self._files = []
+        self._group_idx += 1
+        range_start = files[0][0]
+        range_end = files[-1][0] + len(files[-1][1]) - 1
+        return leaf_dir, range_start, range_end, files
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+import os
+
+def directory_span(fanout, level):
+    """第 level 级目录（1 = 叶子目录）最多覆盖的单元数
+
+    叶子目录最多放 fanout 个单元；叶子目录的分类索引与其放在同一层，
+    所以第2级目录最多放 fanout // 2 个叶子目录（连同各自的索引文件）；更上层每级最多放 fanout 个子目录。
+    """
+    span = fanout
+    if level >= 2:
+        span *= fanout // 2
+    if level >= 3:
+        span *= fanout ** (level - 2)
+    return span
+
+class DirectoryPlan:
+    """单个分类的目录分层方案
+
+    单元（unit）指一个输出文件：一首一文件模式下是一首诗，合集模式下是一个合集文件。
+    各级目录的容量见 directory_span，每个目录的条目数（含分类索引文件）不超过 fanout。
+    目录名为其覆盖的诗词序号范围（如 001-100），与原有的命名方式一致。
+    """
+
+    def __init__(self, unit_count, poems_per_unit, fanout, depth):
+        self.unit_count = unit_count
+        self.poems_per_unit = poems_per_unit
+        self.fanout = fanout
+        self.depth = depth
+
+        # 序号位数：至少3位，超过时按最大序号统一补零，保证设备上按名称排序正确
+        top_span = self.span(depth)
+        top_count = (unit_count + top_span - 1) // top_span if unit_count else 0
+        max_end = top_count * top_span * poems_per_unit
+        self.number_width = max(3, len(str(max_end)))
+
+    def span(self, level):
+        """第 level 级目录最多覆盖的单元数（level 为0时分类目录即叶子目录）"""
+        if level <= 0:
+            return max(self.unit_count, 1)
+        return directory_span(self.fanout, level)
+
+    def _dir_name(self, first_unit, span):
+        """目录名：覆盖的诗词序号范围（按容量计算结束序号）"""
+        start = first_unit * self.poems_per_unit + 1
+        end = (first_unit + span) * self.poems_per_unit
+        return f"{start:0{self.number_width}d}-{end:0{self.number_width}d}"
+
+    def unit_dir(self, unit_idx):
+        """单元所在的相对目录
+        Args:
+            unit_idx: 单元序号（从0开始）
+        Returns:
+            str: 相对于分类目录的路径
+        """
+        parts = []
+        for level in range(self.depth, 0, -1):
+            span = self.span(level)
+            first_unit = (unit_idx // span) * span
+            parts.append(self._dir_name(first_unit, span))
+        return os.path.join(*parts) if parts else ''
+
+    def leaf_groups(self):
+        """按叶子目录分组
+        Returns:
+            list: [(相对目录, 起始单元, 结束单元(不含))]
+        """
+        span = self.span(1 if self.depth else 0)
+        groups = []
+        for first_unit in range(0, self.unit_count, span):
+            last_unit = min(first_unit + span, self.unit_count)
+            groups.append((self.unit_dir(first_unit), first_unit, last_unit))
+        return groups
+
+    def top_level_dirs(self):
+        """分类目录下的第一级子目录
+        Returns:
+            list: [(目录名, 起始诗词序号, 结束诗词序号)]，结束序号为实际序号
+        """
+        if not self.depth:
+            return []
+        span = self.span(self.depth)
+        total_poems = self.unit_count * self.poems_per_unit
+        dirs = []
+        for first_unit in range(0, self.unit_count, span):
+            start = first_unit * self.poems_per_unit + 1
+            end = min((first_unit + span) * self.poems_per_unit, total_poems)
+            dirs.append((self._dir_name(first_unit, span), start, end))
+        return dirs
+
+
+class LayoutPlanner:
+    """输出目录分层规划器
+
+    FAT 文件系统上大目录列举很慢，过深的目录树遍历也慢，
+    因此根据文件数量选择最浅的、每个目录（连同其中的分类索引文件）不超过上限的分层方案。
+    """
+
+    def __init__(self, max_entries_per_dir=100, min_depth=1):
+        """初始化
+        Args:
+            max_entries_per_dir: 每个目录最多容纳的文件/子目录数（含分类索引文件）
+            min_depth: 最少分层数（1 = 与原有的 NNN-NNN 子目录一致）
+        """
+        self.max_entries_per_dir = max(2, max_entries_per_dir)
+        self.min_depth = min_depth
+
+    def plan(self, unit_count, poems_per_unit=1):
+        """为一个分类生成分层方案
+        Args:
+            unit_count: 输出文件数量
+            poems_per_unit: 每个文件包含的诗词数量
+        Returns:
+            DirectoryPlan: 分层方案
+        """
+        fanout = self.max_entries_per_dir
+        depth = self.min_depth
+        while self._capacity(fanout, depth) < unit_count:
+            depth += 1
+        return DirectoryPlan(unit_count, poems_per_unit, fanout, depth)
+
+    @staticmethod
+    def _capacity(fanout, depth):
+        """depth 级分层时分类目录最多容纳的单元数"""
+        if depth == 0:
+            # 分类目录即叶子目录，还要放一个分类索引
+            return fanout - 1
+        # 分类目录相当于第 depth + 1 级目录
+        return directory_span(fanout, depth + 1)
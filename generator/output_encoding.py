@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""输出文件编码
+
+输出内容几乎全是汉字、全角空格和制表符，UTF-8 下每个字符占3字节，
+GB18030 和 UTF-16 下大多只占2字节。
+"""
+import os
+from contextlib import contextmanager
+
+# 配置名 -> (Python编解码器, 文件头BOM)
+OUTPUT_ENCODINGS = {
+    'utf-8': ('utf-8', ''),
+    'gb18030': ('gb18030', ''),
+    'utf-16le': ('utf-16-le', '\ufeff'),  # 小端序，带BOM便于设备识别
+}
+
+# 写入中的临时文件后缀（写完后原子替换为正式文件名）
+PARTIAL_SUFFIX = '.partial'
+
+# 常见写法的别名
+ENCODING_ALIASES = {
+    'utf8': 'utf-8',
+    'gbk': 'gb18030',
+    'utf-16': 'utf-16le',
+    'utf16': 'utf-16le',
+    'utf16le': 'utf-16le',
+}
+
+def normalize_encoding(name):
+    """将配置的编码名规范化，不支持的编码回退为UTF-8
+    Args:
+        name: 配置中的编码名
+    Returns:
+        str: OUTPUT_ENCODINGS 中的编码名
+    """
+    key = (name or 'utf-8').strip().lower()
+    key = ENCODING_ALIASES.get(key, key)
+    if key not in OUTPUT_ENCODINGS:
+        print(f"警告: 不支持的输出编码 {name}，使用 UTF-8")
+        print(f"可选: {', '.join(OUTPUT_ENCODINGS)}")
+        return 'utf-8'
+    return key
+
+def open_output_file(path, encoding='utf-8'):
+    """按输出编码打开文本文件用于写入（需要时写入BOM）
+    Args:
+        path: 文件路径
+        encoding: 输出编码名
+    Returns:
+        file: 已打开的文件对象
+    """
+    codec, bom = OUTPUT_ENCODINGS[normalize_encoding(encoding)]
+    f = open(path, 'w', encoding=codec)
+    if bom:
+        f.write(bom)
+    return f
+
+@contextmanager
+def atomic_output_file(path, encoding='utf-8'):
+    """原子写入：先写入临时文件，成功后再重命名为正式文件
+    中途出错或被中断时删除临时文件，不会留下写了一半的文件。
+    Args:
+        path: 文件路径
+        encoding: 输出编码名
+    Yields:
+        file: 已打开的临时文件对象
+    """
+    tmp_path = path + PARTIAL_SUFFIX
+    f = open_output_file(tmp_path, encoding)
+    try:
+        yield f
+        f.close()
+        os.replace(tmp_path, path)
+    except BaseException:
+        f.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def remove_partial_files(root):
+    """删除目录树中上次运行被强行终止时遗留的临时文件
+    Returns:
+        int: 删除的文件数
+    """
+    removed = 0
+    for dir_path, dir_names, file_names in os.walk(root):
+        for name in file_names:
+            if name.endswith(PARTIAL_SUFFIX):
+                os.remove(os.path.join(dir_path, name))
+                removed += 1
+    return removed
+
+def encode_text(text, encoding='utf-8'):
+    """按输出编码将文本编码为字节（含BOM），与 open_output_file 写出的内容一致"""
+    codec, bom = OUTPUT_ENCODINGS[normalize_encoding(encoding)]
+    return (bom + text).encode(codec)
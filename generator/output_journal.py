@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import os
+
+JOURNAL_NAME = '.generate_journal.jsonl'
+
+def output_signature(settings, render_version):
+    """影响输出内容的排版和文件组织配置（不同时旧的生成记录作废）"""
+    material = [
+        render_version,
+        settings.lines_per_page, settings.chars_per_line,
+        settings.enable_decoration, settings.border_style,
+        settings.poems_per_file, settings.max_entries_per_dir,
+        settings.output_encoding,
+    ]
+    data = json.dumps(material, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def unit_digest(rel_path, poems):
+    """生成单元（一个诗词文件）的内容摘要：文件路径和其中诗词的全部内容"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(rel_path.encode('utf-8'))
+    for poem in poems:
+        material = [poem['title'], poem['author'], poem['paragraphs']]
+        digest.update(json.dumps(material, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    return digest.hexdigest()
+
+class OutputJournal:
+    """生成日志
+
+    每写完一个诗词文件（一首一文件时为一首诗，合并模式为一个批次）就向输出目录中的日志追加一行
+    {分类, 单元序号, 内容摘要}，并立即刷新到操作系统。使用 --resume 续跑时，
+    摘要一致且文件存在的单元直接跳过；排版配置变化时日志作废，从头生成。
+    """
+
+    def __init__(self, output_dir, signature, resume=False):
+        """初始化
+        Args:
+            output_dir: 输出目录
+            signature: 排版配置签名（见 output_signature）
+            resume: 是否读取已有日志继续上次的生成
+        """
+        self.path = os.path.join(output_dir, JOURNAL_NAME)
+        self.signature = signature
+        self.completed = {}  # {(分类, 单元序号): 内容摘要}
+        self.skipped = 0
+        self._truncated = False  # 上次被中断时最后一行没有写完
+
+        # 续跑且配置未变时在原日志后追加，否则重写日志
+        if resume and self._load():
+            self._file = open(self.path, 'a', encoding='utf-8')
+            if self._truncated:
+                self._file.write('\n')
+        else:
+            self._file = open(self.path, 'w', encoding='utf-8')
+            self._file.write(json.dumps({'signature': signature}) + '\n')
+            self._file.flush()
+
+    def _load(self):
+        """读取已有日志（最后一行可能因中断而不完整，忽略即可）
+        Returns:
+            bool: 日志存在且排版配置一致
+        """
+        if not os.path.exists(self.path):
+            print("  未找到生成日志，从头开始生成")
+            return False
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            header = f.readline()
+            try:
+                signature = json.loads(header).get('signature')
+            except ValueError:
+                signature = None
+            if signature != self.signature:
+                print("  排版配置已变化，上次的生成日志作废，从头开始生成")
+                return False
+
+            line = header
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self.completed[(record['c'], record['u'])] = record['d']
+            self._truncated = not line.endswith('\n')
+
+        print(f"  继续上次的生成: 已完成 {len(self.completed)} 个文件")
+        return True
+
+    def is_done(self, category, unit, digest, path):
+        """单元是否已在上次生成中完成（摘要一致且文件仍存在）"""
+        if self.completed.get((category, unit)) == digest and os.path.exists(path):
+            self.skipped += 1
+            return True
+        return False
+
+    def record(self, category, unit, digest):
+        """记录已完成的单元（文件已原子写入之后调用）"""
+        self._file.write(json.dumps({'c': category, 'u': unit, 'd': digest}, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
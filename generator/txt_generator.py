@@ -1,20 +1,37 @@
 # -*- coding: utf-8 -*-
 import os
+from formatter.layout_primitives import to_fullwidth_number
+from generator.category_index import CategoryIndex
+from generator.layout_planner import LayoutPlanner
+from generator.output_encoding import atomic_output_file, normalize_encoding, remove_partial_files
+from generator.output_journal import OutputJournal, output_signature, unit_digest
 
 class TxtGenerator:
     """TXT文件生成器"""
 
-    def __init__(self, settings, formatter):
+    def __init__(self, settings, formatter, render_cache=None, resume=False):
+        """初始化
+        Args:
+            settings: 配置
+            formatter: 页面格式化器
+            render_cache: 持久化渲染缓存 RenderCache（可选）
+            resume: 是否按输出目录中的生成日志跳过上次已完成的文件
+        """
         self.settings = settings
         self.formatter = formatter
-        self.file_mapping = {}  # {分类: {诗词title: 文件名}}
+        self.render_cache = render_cache
+        self.category_indexes = {}  # {分类: CategoryIndex}，供总目录使用
+        self.planner = LayoutPlanner(settings.max_entries_per_dir)
+        self.output_encoding = normalize_encoding(settings.output_encoding)
+        self.resume = resume
+        self.journal = None
 
     def generate_all(self, poems_by_category):
         """生成所有TXT文件
         Args:
             poems_by_category: {分类名: [诗词列表]}
         Returns:
-            dict: 文件映射表
+            int: 处理的诗词数
         """
         output_dir = self.settings.output_dir
         output_dir = os.path.abspath(output_dir)
@@ -25,6 +42,33 @@ class TxtGenerator:
 
         os.makedirs(output_dir, exist_ok=True)
 
+        # 清理上次被强行终止时遗留的临时文件，打开生成日志
+        removed = remove_partial_files(output_dir)
+        if removed:
+            print(f"  已清理 {removed} 个未写完的临时文件")
+        signature = output_signature(self.settings, self.formatter.RENDER_VERSION)
+        self.journal = OutputJournal(output_dir, signature, resume=self.resume)
+        try:
+            processed = self._generate_categories(poems_by_category, output_dir)
+        finally:
+            self.journal.close()
+
+        print(f"\n=" * 60)
+        print(f"生成完成！共处理 {processed} 首诗词")
+        if self.journal.skipped:
+            print(f"续跑: 跳过上次已完成的 {self.journal.skipped} 个文件")
+        print(f"输出目录: {os.path.abspath(output_dir)}")
+        if self.render_cache:
+            stats = self.render_cache.stats()
+            print(f"渲染缓存: 命中 {stats['hits']}，未命中 {stats['misses']}（命中率 {stats['hit_rate']:.1%}）")
+
+        return processed
+
+    def _generate_categories(self, poems_by_category, output_dir):
+        """逐个分类生成诗词文件和分类索引
+        Returns:
+            int: 处理的诗词数
+        """
         total_poems = sum(len(poems) for poems in poems_by_category.values())
         processed = 0
 
@@ -41,17 +85,22 @@ class TxtGenerator:
             category_dir = os.path.join(output_dir, category)
             os.makedirs(category_dir, exist_ok=True)
 
-            self.file_mapping[category] = {}
-
             # 根据配置决定生成方式
             poems_per_file = self.settings.poems_per_file
 
+            # 按文件数量规划子目录分层
+            file_count = (len(poems) + poems_per_file - 1) // poems_per_file
+            plan = self.planner.plan(file_count, poems_per_file)
+
+            # 分类索引条目随文件生成一起收集，每个叶子目录完成后立即输出其目录
+            category_index = CategoryIndex(category, len(poems), plan)
+            self.category_indexes[category] = category_index
+
             if poems_per_file == 1:
                 # 一首诗一个文件（原有逻辑）
                 for idx, poem in enumerate(poems, 1):
                     try:
-                        self._generate_poem_file(poem, category, category_dir, idx)
-                        self.file_mapping[category][poem['title']] = f"{idx:04d}_{poem['title']}.txt"
+                        self._generate_poem_file(poem, category, category_dir, idx, plan)
                         processed += 1
 
                         if processed % 10 == 0:
@@ -59,6 +108,10 @@ class TxtGenerator:
 
                     except Exception as e:
                         print(f"  警告: 生成《{poem['title']}》失败: {e}")
+
+                    group = category_index.add_file(idx - 1, idx, [poem])
+                    if group:
+                        self._generate_category_index(category_index, group, category_dir)
             else:
                 # 多首诗合并到一个文件
                 for batch_start in range(0, len(poems), poems_per_file):
@@ -66,10 +119,7 @@ class TxtGenerator:
                     batch_idx = batch_start // poems_per_file + 1
 
                     try:
-                        filename = self._generate_batch_file(batch_poems, category, category_dir, batch_idx, batch_start + 1)
-                        # 记录批次中每首诗的文件映射
-                        for poem in batch_poems:
-                            self.file_mapping[category][poem['title']] = filename
+                        self._generate_batch_file(batch_poems, category, category_dir, batch_idx, batch_start + 1, plan)
                         processed += len(batch_poems)
 
                         if processed % 10 == 0:
@@ -78,40 +128,47 @@ class TxtGenerator:
                     except Exception as e:
                         print(f"  警告: 生成批次 {batch_idx} 失败: {e}")
 
-            # 生成分类索引文件
-            self._generate_category_index(category, poems, category_dir)
-
-        print(f"\n=" * 60)
-        print(f"生成完成！共处理 {processed} 首诗词")
-        print(f"输出目录: {os.path.abspath(output_dir)}")
+                    group = category_index.add_file(batch_idx - 1, batch_start + 1, batch_poems)
+                    if group:
+                        self._generate_category_index(category_index, group, category_dir)
 
-        return self.file_mapping
+        return processed
 
-    def _generate_poem_file(self, poem, category, category_dir, index):
+    def _generate_poem_file(self, poem, category, category_dir, index, plan):
         """生成单首诗词的TXT文件"""
-        # 计算子目录范围（每100个文件一个子目录）
-        start_idx = ((index - 1) // 100) * 100 + 1
-        end_idx = start_idx + 99
-        subdir_name = f"{start_idx:03d}-{end_idx:03d}"
-        subdir_path = os.path.join(category_dir, subdir_name)
+        # 按分层方案确定子目录
+        subdir = plan.unit_dir(index - 1)
+        subdir_path = os.path.join(category_dir, subdir)
         os.makedirs(subdir_path, exist_ok=True)
 
-        # 格式化诗词内容
-        pages = self.formatter.format_poem(poem)
-
         # 安全的文件名
         safe_title = self._safe_filename(poem['title'])
         filename = f"{index:04d}_{safe_title}.txt"
         filepath = os.path.join(subdir_path, filename)
 
-        # 写入文件
-        with open(filepath, 'w', encoding='utf-8') as f:
+        # 续跑时跳过上次已完成的文件
+        digest = unit_digest(os.path.join(subdir, filename), [poem])
+        if self.journal.is_done(category, index, digest, filepath):
+            return
+
+        # 格式化诗词内容
+        pages = self._format_poem(poem)
+
+        # 写入文件（原子替换）
+        with atomic_output_file(filepath, self.output_encoding) as f:
             for page_idx, page in enumerate(pages, 1):
                 f.write(page)
                 if page_idx < len(pages):
                     f.write("\n")  # 添加换行符让下一页从新行开始
+        self.journal.record(category, index, digest)
+
+    def _format_poem(self, poem, next_poem=None):
+        """格式化诗词，启用渲染缓存时优先复用缓存结果"""
+        if self.render_cache is None:
+            return self.formatter.format_poem(poem, next_poem)
+        return self.render_cache.render(self.formatter, poem, next_poem)
 
-    def _generate_batch_file(self, poems, category, category_dir, batch_idx, start_poem_idx):
+    def _generate_batch_file(self, poems, category, category_dir, batch_idx, start_poem_idx, plan):
         """生成包含多首诗词的批次文件
         Args:
             poems: 诗词列表（该批次的所有诗）
@@ -119,14 +176,13 @@ class TxtGenerator:
             category_dir: 分类目录
             batch_idx: 批次编号
             start_poem_idx: 起始诗词编号
+            plan: 目录分层方案
         Returns:
             str: 文件名
         """
-        # 计算子目录范围
-        start_idx = ((start_poem_idx - 1) // 100) * 100 + 1
-        end_idx = start_idx + 99
-        subdir_name = f"{start_idx:03d}-{end_idx:03d}"
-        subdir_path = os.path.join(category_dir, subdir_name)
+        # 按分层方案确定子目录
+        subdir = plan.unit_dir(batch_idx - 1)
+        subdir_path = os.path.join(category_dir, subdir)
         os.makedirs(subdir_path, exist_ok=True)
 
         # 生成文件名：起止序号
@@ -134,14 +190,19 @@ class TxtGenerator:
         filename = f"{start_poem_idx:04d}-{end_poem_idx:04d}_合集.txt"
         filepath = os.path.join(subdir_path, filename)
 
-        # 格式化所有诗词
-        with open(filepath, 'w', encoding='utf-8') as f:
+        # 续跑时跳过上次已完成的批次
+        digest = unit_digest(os.path.join(subdir, filename), poems)
+        if self.journal.is_done(category, batch_idx, digest, filepath):
+            return filename
+
+        # 格式化所有诗词（原子替换）
+        with atomic_output_file(filepath, self.output_encoding) as f:
             for idx, poem in enumerate(poems):
                 # 获取下一首诗的信息（如果有）
                 next_poem = poems[idx + 1] if idx < len(poems) - 1 else None
 
                 # 格式化当前诗词
-                pages = self.formatter.format_poem(poem, next_poem)
+                pages = self._format_poem(poem, next_poem)
 
                 # 写入所有页面
                 for page_idx, page in enumerate(pages, 1):
@@ -152,98 +213,47 @@ class TxtGenerator:
                 # 如果不是最后一首诗，添加一个换行分隔
                 if idx < len(poems) - 1:
                     f.write("\n")
+        self.journal.record(category, batch_idx, digest)
 
         return filename
 
-    def _to_fullwidth_number(self, num):
-        """将数字转换为全角数字"""
-        halfwidth = '0123456789'
-        fullwidth = '０１２３４５６７８９'
-        trans = str.maketrans(halfwidth, fullwidth)
-        return str(num).translate(trans)
-
-    def _generate_category_index(self, category, poems, category_dir):
-        """生成分类索引文件（按子目录拆分）"""
-        # 按照100个一组分割诗词列表
-        total_poems = len(poems)
-        poems_per_file = self.settings.poems_per_file
-        page_width = self.settings.chars_per_line
-        page_lines = self.settings.lines_per_page
-
-        for start_idx in range(0, total_poems, 100):
-            end_idx = min(start_idx + 100, total_poems)
-            batch_poems = poems[start_idx:end_idx]
-
-            # 子目录范围
-            range_start = start_idx + 1
-            range_end = end_idx
-
-            # 目录文件名
-            index_file = os.path.join(category_dir, f'目录{range_start:03d}-{range_end:03d}.txt')
-
-            lines = []
-
-            # 顶部边框
-            if self.settings.enable_decoration:
-                lines.append('╔' + '　' * (page_width - 2) + '╗')
-                # 分类名居中
-                category_text = f'【{category}】'
-                text_len = len(category_text)
-                if text_len < page_width - 2:
-                    left_pad = (page_width - 2 - text_len) // 2
-                    lines.append('╠' + '　' * left_pad + category_text + '　' * (page_width - 2 - text_len - left_pad) + '╣')
-                else:
-                    lines.append('╠' + category_text[:page_width-2] + '╣')
-
-                # 范围信息 - 使用全角数字和波浪号
-                range_text = f'第{self._to_fullwidth_number(range_start)}～{self._to_fullwidth_number(range_end)}首'
-                text_len = len(range_text)
-                if text_len < page_width - 2:
-                    left_pad = (page_width - 2 - text_len) // 2
-                    lines.append('╠' + '　' * left_pad + range_text + '　' * (page_width - 2 - text_len - left_pad) + '╣')
-                lines.append('╚' + '　' * (page_width - 2) + '╝')
-            else:
-                lines.append('═' * page_width)
-                lines.append(f"{category} ({range_start}～{range_end})".center(page_width, '　'))
-                lines.append('═' * page_width)
-
-            if poems_per_file == 1:
-                # 一首一文件模式 - 标题和作者分行显示
-                for idx, poem in enumerate(batch_poems, start_idx + 1):
-                    title = poem['title']
-                    author = poem['author']
-                    # 格式：全角序号・标题
-                    #      「作者」
-                    num_str = self._to_fullwidth_number(f"{idx:03d}")
-                    title_line = f"{num_str}・{title}"
-                    author_line = f"　　「{author}」"
-                    lines.append(title_line)
-                    lines.append(author_line)
-            else:
-                # 多首合并模式 - 按文件分组
-                for file_start in range(0, len(batch_poems), poems_per_file):
-                    file_poems = batch_poems[file_start:file_start + poems_per_file]
-                    global_start = start_idx + file_start + 1
-                    global_end = global_start + len(file_poems) - 1
-
-                    # 文件标题 - 使用全角数字和波浪号
-                    file_line = f"━{self._to_fullwidth_number(f'{global_start:04d}')}～{self._to_fullwidth_number(f'{global_end:04d}')}━"
-                    lines.append(file_line[:page_width])
-
-                    # 列出文件中的诗词 - 标题和作者分行显示
-                    for idx, poem in enumerate(file_poems):
-                        poem_idx = global_start + idx
-                        title = poem['title']
-                        author = poem['author']
-                        # 全角序号和标题
-                        num_str = self._to_fullwidth_number(f"{poem_idx:03d}")
-                        title_line = f"{num_str}・{title}"
-                        author_line = f"　　「{author}」"
-                        lines.append(title_line)
-                        lines.append(author_line)
-
-            with open(index_file, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(lines))
+    def _generate_category_index(self, category_index, group, category_dir):
+        """生成一个叶子目录的分类索引文件（与对应子目录放在同一层），按页面尺寸分页
+        Args:
+            category_index: 分类索引 CategoryIndex
+            group: CategoryIndex.add_file 返回的叶子目录条目
+            category_dir: 分类目录
+        """
+        leaf_dir, range_start, range_end, files = group
+        width = category_index.plan.number_width
+
+        # 目录文件名
+        index_dir = os.path.join(category_dir, os.path.dirname(leaf_dir))
+        os.makedirs(index_dir, exist_ok=True)
+        index_file = os.path.join(index_dir, f'目录{range_start:0{width}d}-{range_end:0{width}d}.txt')
+
+        # 条目：标题和作者分行显示，一首诗的两行不跨页
+        #   全角序号・标题
+        #   　　「作者」
+        entries = []
+        for start_idx, poems in files:
+            file_entries = []
+            for poem_idx, (title, author) in enumerate(poems, start_idx):
+                num_str = to_fullwidth_number(f"{poem_idx:03d}")
+                file_entries.append([f"{num_str}・{title}", f"　　「{author}」"])
+
+            if self.settings.poems_per_file > 1:
+                # 多首合并模式 - 文件标题（全角起止序号）与第一首诗排在一起
+                global_end = start_idx + len(poems) - 1
+                file_line = f"━{to_fullwidth_number(f'{start_idx:04d}')}～{to_fullwidth_number(f'{global_end:04d}')}━"
+                file_entries[0].insert(0, file_line)
+            entries.extend(file_entries)
+
+        range_text = f'第{to_fullwidth_number(range_start)}～{to_fullwidth_number(range_end)}首'
+        pages = self.formatter.format_index(f'【{category_index.category}】', range_text, entries)
+
+        with atomic_output_file(index_file, self.output_encoding) as f:
+            f.write('\n'.join(pages))
 
     def _safe_filename(self, filename):
         """生成安全的文件名"""
@@ -7,22 +7,154 @@
 3. 生成适合ESP32电子书的TXT文件
 4. 创建嵌套目录结构便于快速定位
 """
+import argparse
 import os
 import sys
 from config.settings import Settings
 from parser.json_parser import JsonParser
-from formatter.page_formatter import PageFormatter
+from parser.poem_filter import PoemFilter
+from parser.poem_sorter import load_poems
+from formatter.page_formatter import PageFormatter, WrapCache
 from generator.txt_generator import TxtGenerator
+from generator.book_generator import BookGenerator
 from generator.catalog_builder import CatalogBuilder
+from formatter.render_cache import RenderCache
+
+def render_profile(settings, poems_by_category, wrap_cache=None, render_cache=None, resume=False):
+    """按单个输出配置渲染全部诗词
+    Args:
+        settings: 该输出配置的设置
+        poems_by_category: 解析结果 {分类名: [诗词列表]}
+        wrap_cache: 行宽相同的配置之间共享的换行缓存（可选）
+        render_cache: 持久化渲染缓存（可选）
+        resume: 跳过上次中断前已完成的文件
+    """
+    if settings.output_format not in ('txt', 'book', 'both'):
+        raise ValueError(f"不支持的输出格式: {settings.output_format}，可选: txt, book, both")
+
+    # 3. 初始化格式化器
+    print("\n[3/5] 初始化页面格式化器...")
+    formatter = PageFormatter(settings, wrap_cache=wrap_cache)
+    print(f"  页面设置: {settings.lines_per_page}行 × {settings.chars_per_line}字符")
+    print(f"  装饰模式: {'开启' if settings.enable_decoration else '关闭'}")
+
+    # 4. 生成打包书文件
+    if settings.output_format in ('book', 'both'):
+        print("\n[4/5] 生成书文件...")
+        BookGenerator(settings, formatter, render_cache=render_cache).generate_all(poems_by_category)
+        if settings.output_format == 'book':
+            print("\n[5/5] 跳过目录生成（书文件自带诗词表）")
+            return
+
+    # 4. 生成TXT文件
+    print("\n[4/5] 生成TXT文件...")
+    generator = TxtGenerator(settings, formatter, render_cache=render_cache, resume=resume)
+    generator.generate_all(poems_by_category)
+
+    # 5. 生成总目录
+    if settings.enable_catalog:
+        print("\n[5/5] 生成总目录...")
+        catalog_builder = CatalogBuilder(settings, formatter)
+        catalog_content = catalog_builder.build_catalog(generator.category_indexes)
+        catalog_builder.save_catalog(catalog_content, settings.output_dir)
+    else:
+        print("\n[5/5] 跳过目录生成（配置已禁用）")
+
+def render_all(settings, poems_by_category, resume=False):
+    """按全部输出配置渲染（解析结果在各配置之间共享）
+    Args:
+        settings: 顶层配置
+        poems_by_category: 解析结果 {分类名: [诗词列表]}
+        resume: 跳过上次中断前已完成的文件
+    Returns:
+        list: [(profile名称, Settings)]
+    """
+    # 3~5. 按每个输出配置渲染
+    profiles = settings.get_profile_settings()
+    # 行宽相同的配置共享换行缓存（限制容量的LRU）
+    column_counts = {}
+    for _, profile_settings in profiles:
+        column_counts[profile_settings.chars_per_line] = column_counts.get(profile_settings.chars_per_line, 0) + 1
+    wrap_caches = {
+        columns: WrapCache() for columns, count in column_counts.items() if count > 1
+    }
+
+    # 持久化渲染缓存（各输出配置共享，键中包含排版参数）
+    render_cache = None
+    if settings.render_cache_path:
+        render_cache = RenderCache(settings.render_cache_path, settings.render_cache_max_mb * 1024 * 1024)
+
+    try:
+        for name, profile_settings in profiles:
+            if len(profiles) > 1:
+                print("\n" + "-"*60)
+                print(f"  输出配置: {name} -> {os.path.abspath(profile_settings.output_dir)}")
+                print("-"*60)
+            render_profile(profile_settings, poems_by_category,
+                           wrap_caches.get(profile_settings.chars_per_line), render_cache, resume)
+    finally:
+        if render_cache:
+            render_cache.flush()
+            stats = render_cache.stats()
+            render_cache.close()
+            print(f"\n渲染缓存: 共命中 {stats['hits']}，未命中 {stats['misses']}，"
+                  f"淘汰 {stats['evicted']}，占用 {stats['bytes'] / (1024 * 1024):.1f} MB")
+
+    return profiles
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    arg_parser = argparse.ArgumentParser(description='古诗词TXT生成器')
+    arg_parser.add_argument('--config', default=os.path.join(os.path.dirname(__file__), 'config.json'),
+                            help='配置文件路径（默认为程序目录下的 config.json）')
+    arg_parser.add_argument('--resume', action='store_true',
+                            help='继续上次被中断的生成，跳过输出目录生成日志中已完成的文件')
+    arg_parser.add_argument('--stats', action='store_true', help='只统计语料（长度、页数分布等），不生成文件')
+    arg_parser.add_argument('--serve', action='store_true', help='以本地渲染服务模式运行，按需渲染页面')
+    arg_parser.add_argument('--host', default='127.0.0.1', help='渲染服务监听地址')
+    arg_parser.add_argument('--port', type=int, default=8000, help='渲染服务监听端口')
+    arg_parser.add_argument('--cache-size', type=int, default=1024, help='渲染服务页面缓存容量（诗词数）')
+    return arg_parser.parse_args(argv)
+
+def serve(args):
+    """本地渲染服务模式"""
+    from api.library import PoetryLibrary
+    from api.render_server import RenderServer
+
+    if os.path.exists(args.config):
+        library = PoetryLibrary.from_config_file(args.config)
+    else:
+        print(f"  警告: 配置文件不存在，使用默认配置")
+        library = PoetryLibrary(Settings(), base_dir=os.path.dirname(os.path.abspath(__file__)))
+
+    print("加载诗词...")
+    library.load()
+    for warning in library.warnings:
+        print(warning)
+    total_poems = sum(count for _, count in library.categories())
+    print(f"  加载完成: {len(library.categories())} 个分类，共 {total_poems} 首诗词")
+
+    server = RenderServer(library, args.host, args.port, args.cache_size)
+    print(f"渲染服务已启动: {server.url}（Ctrl+C 退出）")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        library.close()
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.serve:
+        serve(args)
+        return
 
-def main():
     print("="*60)
     print(" "*15 + "古诗词TXT生成器")
     print("="*60)
 
     # 1. 加载配置
     print("\n[1/5] 加载配置...")
-    config_path = os.path.join(os.path.dirname(__file__), 'config.json')
+    config_path = args.config
     settings = Settings()
 
     if os.path.exists(config_path):
@@ -31,6 +163,13 @@ def main():
         print(f"  警告: 配置文件不存在，使用默认配置")
         print(f"  配置: {settings.lines_per_page}行 × {settings.chars_per_line}字符/行")
 
+    # 在解析之前检查多输出配置，避免解析完全部诗词后才报错
+    try:
+        settings.get_profile_settings()
+    except ValueError as e:
+        print(f"  错误: {e}")
+        return
+
     # 将配置的标题分隔符同步到JsonParser
     JsonParser.TITLE_SEPARATOR = settings.title_separator
 
@@ -45,44 +184,39 @@ def main():
         print(f"  错误: 诗词根目录不存在: {poetry_root}")
         return
 
-    parser = JsonParser(poetry_root, text_conversion=settings.text_conversion)
-    poems_by_category = parser.load_all_poems(
-        min_length=settings.min_poem_length,
-        max_length=settings.max_poem_length
-    )
-
-    total_categories = len(poems_by_category)
-    total_poems = sum(len(poems) for poems in poems_by_category.values())
-    print(f"  加载完成: {total_categories} 个分类，共 {total_poems} 首诗词")
-
-    if total_poems == 0:
-        print("  错误: 未找到符合条件的诗词")
+    if args.stats:
+        from tools.corpus_stats import run as run_stats
+        run_stats(settings, poetry_root)
         return
 
-    # 3. 初始化格式化器
-    print("\n[3/5] 初始化页面格式化器...")
-    formatter = PageFormatter(settings)
-    print(f"  页面设置: {settings.lines_per_page}行 × {settings.chars_per_line}字符")
-    print(f"  装饰模式: {'开启' if settings.enable_decoration else '关闭'}")
+    parser = JsonParser(poetry_root, text_conversion=settings.text_conversion)
+    poem_filter = PoemFilter.from_settings(settings)
+    if settings.poem_order != 'none':
+        # 外部排序：边解析边排序，超出内存预算的部分写入临时文件
+        print(f"  排序方式: {settings.poem_order}（内存预算 {settings.sort_memory_mb} MB）")
+    poems_by_category, sorter = load_poems(parser, settings, poem_filter)
+    if sorter:
+        print(f"  排序完成: 归并 {sorter.run_count} 个有序段")
 
-    # 4. 生成TXT文件
-    print("\n[4/5] 生成TXT文件...")
-    generator = TxtGenerator(settings, formatter)
-    file_mapping = generator.generate_all(poems_by_category)
+    try:
+        total_categories = len(poems_by_category)
+        total_poems = sum(len(poems) for poems in poems_by_category.values())
+        print(f"  加载完成: {total_categories} 个分类，共 {total_poems} 首诗词")
 
-    # 5. 生成总目录
-    if settings.enable_catalog:
-        print("\n[5/5] 生成总目录...")
-        catalog_builder = CatalogBuilder(settings)
-        catalog_content = catalog_builder.build_catalog(poems_by_category, file_mapping)
-        catalog_builder.save_catalog(catalog_content, settings.output_dir)
-    else:
-        print("\n[5/5] 跳过目录生成（配置已禁用）")
+        if total_poems == 0:
+            print("  错误: 未找到符合条件的诗词")
+            return
+
+        profiles = render_all(settings, poems_by_category, resume=args.resume)
+    finally:
+        if sorter:
+            sorter.close()
 
     print("\n" + "="*60)
     print("  [完成] 全部完成！")
     print("="*60)
-    print(f"\n输出目录: {os.path.abspath(settings.output_dir)}")
+    for _, profile_settings in profiles:
+        print(f"\n输出目录: {os.path.abspath(profile_settings.output_dir)}")
     print("\n使用说明:")
     print("  1. 将输出目录下的所有文件复制到ESP32电子书")
     print("  2. 按分类目录浏览，每首诗词为独立文件")
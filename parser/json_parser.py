@@ -1,20 +1,24 @@
 # -*- coding: utf-8 -*-
 import json
 import os
+from parser.poem_filter import PoemFilter
 
 class JsonParser:
     """解析JSON诗词文件，支持批量读取和分类"""
 
-    def __init__(self, poetry_root_dir, text_conversion='none'):
+    def __init__(self, poetry_root_dir, text_conversion='none', verbose=True):
         """初始化
         Args:
             poetry_root_dir: 诗词JSON文件的根目录
             text_conversion: 简繁转换模式 (none/s2t/t2s/s2tw/tw2s)
+            verbose: 是否打印警告（为False时只记录到 warnings）
         """
         self.poetry_root_dir = poetry_root_dir
         self.poems_by_category = {}
         self.text_conversion = text_conversion
         self.converter = None
+        self.verbose = verbose
+        self.warnings = []  # 解析过程中的警告信息
 
         # 初始化OpenCC转换器
         if text_conversion != 'none':
@@ -22,13 +26,19 @@ class JsonParser:
                 from opencc import OpenCC
                 self.converter = OpenCC(text_conversion)
             except ImportError:
-                print("警告: opencc库未安装，简繁转换功能将被禁用")
-                print("请运行: pip install opencc-python-reimplemented")
+                self._warn("警告: opencc库未安装，简繁转换功能将被禁用")
+                self._warn("请运行: pip install opencc-python-reimplemented")
                 self.converter = None
             except Exception as e:
-                print(f"警告: 初始化OpenCC失败: {e}")
+                self._warn(f"警告: 初始化OpenCC失败: {e}")
                 self.converter = None
 
+    def _warn(self, message):
+        """记录警告，verbose 时同时打印"""
+        self.warnings.append(message)
+        if self.verbose:
+            print(message)
+
     # 标题分隔符配置（类变量）
     TITLE_SEPARATOR = '・'  # 标题中的分隔符，可配置
 
@@ -67,14 +77,52 @@ class JsonParser:
                 return True
         return False
 
-    def load_all_poems(self, min_length=0, max_length=float('inf')):
+    def load_all_poems(self, min_length=0, max_length=float('inf'), poem_filter=None):
         """加载所有诗词JSON文件
         Args:
             min_length: 最小诗词长度
             max_length: 最大诗词长度
+            poem_filter: 筛选条件 PoemFilter（可选，提供时忽略 min_length/max_length）
         Returns:
             dict: {分类名: [诗词列表]}
         """
+        poem_filter = self._prepare_filter(min_length, max_length, poem_filter)
+
+        for category_name, category_path in self._iter_category_dirs(poem_filter):
+            self.poems_by_category[category_name] = []
+            for poems in self._iter_category_files(category_path, poem_filter):
+                self.poems_by_category[category_name].extend(poems)
+
+        return self.poems_by_category
+
+    def iter_poems(self, min_length=0, max_length=float('inf'), poem_filter=None):
+        """逐首产出诗词，不在内存中保留整个语料（用于统计等单遍处理）
+        Args:
+            min_length: 最小诗词长度
+            max_length: 最大诗词长度
+            poem_filter: 筛选条件 PoemFilter（可选，提供时忽略 min_length/max_length）
+        Yields:
+            tuple: (分类名, 诗词)
+        """
+        poem_filter = self._prepare_filter(min_length, max_length, poem_filter)
+
+        for category_name, category_path in self._iter_category_dirs(poem_filter):
+            for poems in self._iter_category_files(category_path, poem_filter):
+                for poem in poems:
+                    yield category_name, poem
+
+    def _prepare_filter(self, min_length, max_length, poem_filter):
+        """确定筛选条件并绑定简繁转换器"""
+        if poem_filter is None:
+            poem_filter = PoemFilter(min_length, max_length)
+        poem_filter.bind_converter(self.converter, self._normalize_title_spaces)
+        return poem_filter
+
+    def _iter_category_dirs(self, poem_filter):
+        """遍历需要处理的分类目录
+        Yields:
+            tuple: (分类名, 目录路径)
+        """
         for item in os.listdir(self.poetry_root_dir):
             item_path = os.path.join(self.poetry_root_dir, item)
 
@@ -82,25 +130,37 @@ class JsonParser:
             if not os.path.isdir(item_path) or not self.is_chinese_directory(item):
                 continue
 
-            category_name = item
-            self.poems_by_category[category_name] = []
+            # 分类筛选：被排除的分类不读取任何文件
+            if not poem_filter.accept_category(item):
+                continue
 
-            # 遍历目录中的JSON文件
-            for filename in os.listdir(item_path):
-                if not filename.endswith('.json'):
-                    continue
+            yield item, item_path
 
-                file_path = os.path.join(item_path, filename)
-                try:
-                    poems = self._parse_json_file(file_path, min_length, max_length)
-                    self.poems_by_category[category_name].extend(poems)
-                except Exception as e:
-                    print(f"警告: 读取 {file_path} 失败: {e}")
+    def _iter_category_files(self, category_path, poem_filter):
+        """逐个解析分类目录中的JSON文件
+        Yields:
+            list: 单个文件中的诗词列表
+        """
+        for filename in os.listdir(category_path):
+            if not filename.endswith('.json'):
+                continue
 
-        return self.poems_by_category
+            file_path = os.path.join(category_path, filename)
+            try:
+                poems = self._parse_json_file(file_path, poem_filter)
+            except Exception as e:
+                self._warn(f"警告: 读取 {file_path} 失败: {e}")
+                continue
+            yield poems
 
-    def _parse_json_file(self, file_path, min_length, max_length):
-        """解析单个JSON文件"""
+    def _parse_json_file(self, file_path, poem_filter):
+        """解析单个JSON文件
+        Args:
+            file_path: JSON文件路径
+            poem_filter: 筛选条件，在提取（规范化、简繁转换）之前对原始条目求值
+        Returns:
+            list: 诗词列表
+        """
         with open(file_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
 
@@ -110,14 +170,17 @@ class JsonParser:
         if isinstance(data, list):
             # 格式：[{title: ..., paragraphs: [...]}, ...]
             for item in data:
+                if not poem_filter.accept_item(item):
+                    continue
                 poem = self._extract_poem_info(item)
-                if poem and min_length <= poem['length'] <= max_length:
+                if poem:
                     poems.append(poem)
         elif isinstance(data, dict):
             # 格式：{title: ..., paragraphs: [...]}
-            poem = self._extract_poem_info(data)
-            if poem and min_length <= poem['length'] <= max_length:
-                poems.append(poem)
+            if poem_filter.accept_item(data):
+                poem = self._extract_poem_info(data)
+                if poem:
+                    poems.append(poem)
 
         return poems
 
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+import re
+
+class PoemFilter:
+    """诗词筛选条件
+
+    在规范化空格和简繁转换之前，直接对原始JSON条目求值，
+    被筛掉的诗词不再承担正文转换和拼接的开销。
+    按代价从低到高依次判断：分类 → 长度 → 作者 → 标题。
+    """
+
+    def __init__(self, min_length=0, max_length=float('inf'),
+                 author_include=None, author_exclude=None, title_regex=None,
+                 category_include=None, category_exclude=None):
+        """初始化
+        Args:
+            min_length: 最小诗词长度
+            max_length: 最大诗词长度
+            author_include: 只保留这些作者（为空则不限制）
+            author_exclude: 排除这些作者
+            title_regex: 标题需匹配的正则表达式（re.search 语义），原始标题或输出中的标题（空格已换成分隔符）匹配均可
+            category_include: 只处理这些分类目录（为空则不限制）
+            category_exclude: 跳过这些分类目录
+        """
+        self.min_length = min_length
+        self.max_length = max_length
+        self.author_include = set(author_include or [])
+        self.author_exclude = set(author_exclude or [])
+        self.title_pattern = re.compile(title_regex) if title_regex else None
+        self.category_include = set(category_include or [])
+        self.category_exclude = set(category_exclude or [])
+
+        # 简繁转换器和标题规范化函数由解析器绑定，用于让作者/标题条件按输出中的文字匹配
+        self.converter = None
+        self.normalize_title = None
+        self._author_cache = {}  # {原始作者: 规范化并转换后的作者}
+
+    @classmethod
+    def from_settings(cls, settings):
+        """根据配置创建筛选条件"""
+        return cls(
+            min_length=settings.min_poem_length,
+            max_length=settings.max_poem_length,
+            author_include=settings.author_include,
+            author_exclude=settings.author_exclude,
+            title_regex=settings.title_regex,
+            category_include=settings.category_include,
+            category_exclude=settings.category_exclude,
+        )
+
+    def bind_converter(self, converter, normalize_title=None):
+        """绑定简繁转换器和标题空格规范化函数（与解析器使用同一套）"""
+        self.converter = converter
+        self.normalize_title = normalize_title
+        self._author_cache = {}
+
+    def accept_category(self, category):
+        """判断分类目录是否需要处理（在读取目录内文件之前调用）"""
+        if self.category_include and category not in self.category_include:
+            return False
+        return category not in self.category_exclude
+
+    def accept_item(self, item):
+        """判断原始JSON条目是否保留
+        Args:
+            item: 原始JSON条目 {title, author, paragraphs}
+        Returns:
+            bool: 是否保留
+        """
+        if not isinstance(item, dict):
+            return False
+
+        paragraphs = item.get('paragraphs', [])
+        if not paragraphs:
+            return False
+
+        # 空格规范化不改变字符数，直接用原始段落计算长度
+        length = sum(len(para) for para in paragraphs)
+        if not self.min_length <= length <= self.max_length:
+            return False
+
+        if self.author_include or self.author_exclude:
+            if not self._accept_author(item.get('author', '佚名')):
+                return False
+
+        if self.title_pattern is not None:
+            if not self._accept_title(item.get('title', '无题')):
+                return False
+
+        return True
+
+    def _accept_author(self, author):
+        """作者条件：原始作者名或转换后的作者名任一命中即可"""
+        names = (author, self._converted_author(author))
+        if self.author_include and not any(name in self.author_include for name in names):
+            return False
+        if any(name in self.author_exclude for name in names):
+            return False
+        return True
+
+    def _converted_author(self, author):
+        """作者名规范化并转换（按作者缓存，同一作者只转换一次）"""
+        converted = self._author_cache.get(author)
+        if converted is None:
+            converted = author.replace(' ', '　')
+            if self.converter:
+                converted = self.converter.convert(converted)
+            self._author_cache[author] = converted
+        return converted
+
+    def _accept_title(self, title):
+        """标题条件：原始标题不匹配时，再用输出中的标题（空格换成分隔符、简繁转换后）匹配"""
+        if self.title_pattern.search(title):
+            return True
+        if self.normalize_title:
+            normalized = self.normalize_title(title)
+            if normalized != title and self.title_pattern.search(normalized):
+                return True
+            title = normalized
+        if self.converter:
+            return self.title_pattern.search(self.converter.convert(title)) is not None
+        return False
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+import heapq
+import json
+import os
+import tempfile
+import threading
+from array import array
+
+# 排序方式 -> 排序键（相同主键时依次比较其余字段，保证结果与文件遍历顺序无关）
+SORT_KEYS = {
+    'author': lambda poem: (poem['author'], poem['title'], poem['content']),
+    'title': lambda poem: (poem['title'], poem['author'], poem['content']),
+    'length': lambda poem: (poem['length'], poem['title'], poem['author'], poem['content']),
+}
+
+# 一次归并同时打开的有序段数上限，超过时分多趟归并，避免超出进程可打开的文件数
+MERGE_FAN_IN = 64
+
+class SpilledPoemList:
+    """存放在磁盘文件中的有序诗词序列
+
+    内存中只保留每首诗的文件偏移量，支持 len()、下标、切片和顺序遍历，
+    可以直接替代诗词列表交给 TxtGenerator；下标读取可以在多个线程中并发调用（渲染服务）。
+    """
+
+    def __init__(self, file_path, offsets):
+        self.file_path = file_path
+        self.offsets = offsets  # array('Q')：每首诗所在行的起始偏移
+        self._file = None
+        self._lock = threading.Lock()  # 下标读取共用一个文件句柄，seek 和读取需成对完成
+
+    def _handle(self):
+        if self._file is None or self._file.closed:
+            self._file = open(self.file_path, 'rb')
+        return self._file
+
+    def _read_at(self, offset):
+        with self._lock:
+            f = self._handle()
+            f.seek(offset)
+            line = f.readline()
+        return json.loads(line.decode('utf-8'))
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._read_at(offset) for offset in self.offsets[index]]
+        return self._read_at(self.offsets[index])
+
+    def __iter__(self):
+        if not self.offsets:
+            return
+        f = open(self.file_path, 'rb')
+        try:
+            f.seek(self.offsets[0])
+            for _ in range(len(self.offsets)):
+                yield json.loads(f.readline().decode('utf-8'))
+        finally:
+            f.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class ExternalPoemSorter:
+    """外部排序：在有限内存内将诗词按分类排序
+
+    逐首读入诗词，缓冲区达到内存预算时排序后写入临时文件（有序段），
+    最后对所有有序段做多路归并（每次最多 MERGE_FAN_IN 路，段数更多时先归并成较长的中间段），
+    按分类写入一个结果文件，只在内存中保留偏移量。
+    """
+
+    def __init__(self, sort_key='author', memory_budget_mb=64, temp_dir=None):
+        """初始化
+        Args:
+            sort_key: 排序方式 (author/title/length)
+            memory_budget_mb: 排序缓冲区的内存预算（MB）
+            temp_dir: 临时文件目录（默认使用系统临时目录）
+        """
+        if sort_key not in SORT_KEYS:
+            raise ValueError(f"不支持的排序方式: {sort_key}，可选: {', '.join(SORT_KEYS)}")
+        self.sort_key = sort_key
+        self.key_func = SORT_KEYS[sort_key]
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self._temp = tempfile.TemporaryDirectory(prefix='poem_sort_', dir=temp_dir or None)
+        self.run_count = 0
+        self._lists = []
+
+    def sort(self, poems):
+        """排序
+        Args:
+            poems: 可迭代的 (分类名, 诗词)，通常为 JsonParser.iter_poems()
+        Returns:
+            dict: {分类名: SpilledPoemList}
+        """
+        run_paths = []
+        buffer = []
+        buffer_bytes = 0
+
+        for category, poem in poems:
+            line = json.dumps(poem, ensure_ascii=False)
+            buffer.append(((category,) + self.key_func(poem), line))
+            # 粗略估算内存占用：JSON行和排序键中的字段各按每字符2字节计，另加对象开销
+            buffer_bytes += len(line) * 4 + 200
+            if buffer_bytes >= self.memory_budget:
+                run_paths.append(self._spill(buffer))
+                buffer = []
+                buffer_bytes = 0
+
+        if buffer:
+            run_paths.append(self._spill(buffer))
+
+        return self._merge(run_paths)
+
+    def _spill(self, buffer):
+        """将缓冲区排序后写入一个有序段文件"""
+        buffer.sort(key=lambda item: item[0])
+        return self._write_run(buffer)
+
+    def _write_run(self, records):
+        """将有序的 (排序键, 诗词JSON行) 写入一个新的有序段文件"""
+        run_path = os.path.join(self._temp.name, f'run{self.run_count:05d}.jsonl')
+        with open(run_path, 'w', encoding='utf-8') as f:
+            for (category, *_), line in records:
+                f.write(json.dumps(category, ensure_ascii=False))
+                f.write('\t')
+                f.write(line)
+                f.write('\n')
+        self.run_count += 1
+        return run_path
+
+    def _read_run(self, run_path):
+        """顺序读取有序段，产出 (排序键, 诗词JSON行)"""
+        with open(run_path, 'r', encoding='utf-8') as f:
+            for record in f:
+                category_json, line = record.rstrip('\n').split('\t', 1)
+                poem = json.loads(line)
+                yield (json.loads(category_json),) + self.key_func(poem), line
+
+    def _merge_runs(self, run_paths):
+        """归并一组有序段，产出 (排序键, 诗词JSON行)"""
+        runs = [self._read_run(path) for path in run_paths]
+        return heapq.merge(*runs, key=lambda item: item[0])
+
+    def _merge(self, run_paths):
+        """多路归并所有有序段，写入结果文件并按分类记录偏移"""
+        # 段数超过 MERGE_FAN_IN 时逐趟把每 MERGE_FAN_IN 个段归并成一个中间段
+        while len(run_paths) > MERGE_FAN_IN:
+            merged_paths = []
+            for start in range(0, len(run_paths), MERGE_FAN_IN):
+                group = run_paths[start:start + MERGE_FAN_IN]
+                if len(group) == 1:
+                    merged_paths.append(group[0])
+                    continue
+                merged_paths.append(self._write_run(self._merge_runs(group)))
+                for path in group:
+                    os.remove(path)
+            run_paths = merged_paths
+
+        result_path = os.path.join(self._temp.name, 'sorted.jsonl')
+        offsets_by_category = {}
+
+        with open(result_path, 'wb') as out:
+            for sort_tuple, line in self._merge_runs(run_paths):
+                category = sort_tuple[0]
+                offsets = offsets_by_category.get(category)
+                if offsets is None:
+                    offsets = offsets_by_category[category] = array('Q')
+                offsets.append(out.tell())
+                out.write(line.encode('utf-8'))
+                out.write(b'\n')
+
+        # 归并完成后有序段不再需要
+        for path in run_paths:
+            os.remove(path)
+
+        result = {}
+        for category, offsets in offsets_by_category.items():
+            poem_list = SpilledPoemList(result_path, offsets)
+            self._lists.append(poem_list)
+            result[category] = poem_list
+        return result
+
+    def close(self):
+        """关闭并删除临时文件"""
+        for poem_list in self._lists:
+            poem_list.close()
+        self._temp.cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def load_poems(parser, settings, poem_filter=None):
+    """按配置解析诗词：poem_order 不为 none 时边解析边外部排序（main.py、库接口和校验工具共用）
+    Args:
+        parser: JsonParser
+        settings: 配置（poem_order、sort_memory_mb、temp_dir）
+        poem_filter: 诗词筛选器（可选）
+    Returns:
+        tuple: (poems_by_category, sorter)，sorter 为 None 或 ExternalPoemSorter（诗词用完后需调用 close()）
+    """
+    if settings.poem_order == 'none':
+        return parser.load_all_poems(poem_filter=poem_filter), None
+
+    sorter = ExternalPoemSorter(settings.poem_order, settings.sort_memory_mb, settings.temp_dir)
+    try:
+        return sorter.sort(parser.iter_poems(poem_filter=poem_filter)), sorter
+    except BaseException:
+        sorter.close()
+        raise
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""随机翻页基准测试：打包书文件 vs TXT 目录树
+
+在 output_format 为 both 生成的输出目录上，分别随机读取若干页：
+  - TXT：打开随机一个诗词文件，读入并按每页行数切出随机一页（设备没有索引时的做法）
+  - 书文件：打开随机一个 .pbk，按页表读取随机一页；另测书文件保持打开时的读取（阅读器的常见用法）
+报告每次读取的平均/中位/P99 耗时，以及两种格式的文件数和总大小。
+测试在操作系统文件缓存已预热的情况下进行，SD 卡上打开文件的开销会使差距更大。
+
+用法:
+    python -m tools.book_benchmark <输出目录> --page-lines 14 [--samples 2000] [--seed 1]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from generator.book_format import BOOK_EXTENSION, BookReader
+from tools.verify_output import _decode
+
+def find_files(output_dir):
+    """列出输出目录中的诗词TXT文件和书文件（不含目录和索引文件）
+    Returns:
+        tuple: (TXT文件路径列表, 书文件路径列表)
+    """
+    txt_files = []
+    book_files = []
+    for dir_path, dir_names, file_names in os.walk(output_dir):
+        dir_names.sort()
+        for name in sorted(file_names):
+            path = os.path.join(dir_path, name)
+            if name.endswith(BOOK_EXTENSION):
+                book_files.append(path)
+            elif name.endswith('.txt') and not name.startswith(('00_', '目录')):
+                txt_files.append(path)
+    return txt_files, book_files
+
+def read_txt_page(path, page_index, page_lines):
+    """读取TXT文件中的一页（整文件读入后按行切分）"""
+    with open(path, 'rb') as f:
+        lines = _decode(f.read()).split('\n')
+    return '\n'.join(lines[page_index * page_lines:(page_index + 1) * page_lines])
+
+def read_book_page(path, page_index):
+    """打开书文件并读取一页"""
+    with BookReader(path) as reader:
+        return reader.page(page_index)
+
+def _summary(name, timings):
+    timings.sort()
+    count = len(timings)
+    average = sum(timings) / count
+    return (f"{name}\n      平均 {average * 1e6:8.1f} µs  中位 {timings[count // 2] * 1e6:8.1f} µs"
+            f"  P99 {timings[min(count - 1, int(count * 0.99))] * 1e6:8.1f} µs")
+
+def run(output_dir, page_lines, samples=2000, seed=1):
+    """执行基准测试并打印报告
+    Returns:
+        dict: {txt: [耗时], book: [耗时], book_open: [耗时]}
+    """
+    txt_files, book_files = find_files(output_dir)
+    if not txt_files or not book_files:
+        raise FileNotFoundError(f"输出目录中需要同时有TXT文件和书文件（output_format 设为 both）: {output_dir}")
+
+    # 准备：各文件的页数（不计入耗时）
+    txt_pages = []
+    for path in txt_files:
+        with open(path, 'rb') as f:
+            line_count = _decode(f.read()).count('\n') + 1
+        txt_pages.append(max(1, line_count // page_lines))
+    book_pages = []
+    for path in book_files:
+        with BookReader(path) as reader:
+            book_pages.append(reader.page_count)
+
+    rng = random.Random(seed)
+    txt_samples = [(idx, rng.randrange(txt_pages[idx])) for idx in (rng.randrange(len(txt_files)) for _ in range(samples))]
+    book_samples = [(idx, rng.randrange(book_pages[idx])) for idx in (rng.randrange(len(book_files)) for _ in range(samples))]
+
+    timings = {'txt': [], 'book': [], 'book_open': []}
+    for idx, page_index in txt_samples:
+        start = time.perf_counter()
+        read_txt_page(txt_files[idx], page_index, page_lines)
+        timings['txt'].append(time.perf_counter() - start)
+    for idx, page_index in book_samples:
+        start = time.perf_counter()
+        read_book_page(book_files[idx], page_index)
+        timings['book'].append(time.perf_counter() - start)
+
+    readers = [BookReader(path, block_cache_size=0) for path in book_files]
+    try:
+        for idx, page_index in book_samples:
+            start = time.perf_counter()
+            readers[idx].page(page_index)
+            timings['book_open'].append(time.perf_counter() - start)
+    finally:
+        for reader in readers:
+            reader.close()
+
+    txt_bytes = sum(os.path.getsize(path) for path in txt_files)
+    book_bytes = sum(os.path.getsize(path) for path in book_files)
+    print(f"TXT: {len(txt_files)} 个文件，{sum(txt_pages)} 页，{txt_bytes / 1024 / 1024:.2f} MB")
+    print(f"书文件: {len(book_files)} 个文件，{sum(book_pages)} 页，{book_bytes / 1024 / 1024:.2f} MB")
+    print(f"随机读取 {samples} 页:")
+    print("  " + _summary('TXT（每次打开文件）', timings['txt']))
+    print("  " + _summary('书文件（每次打开文件）', timings['book']))
+    print("  " + _summary('书文件（保持打开，不缓存数据块）', timings['book_open']))
+    return timings
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description='随机翻页基准测试：打包书文件 vs TXT 目录树')
+    arg_parser.add_argument('output_dir', help='output_format 为 both 时生成的输出目录')
+    arg_parser.add_argument('--page-lines', type=int, required=True, help='每页行数（与生成时的 page_lines 一致）')
+    arg_parser.add_argument('--samples', type=int, default=2000, help='随机读取的页数')
+    arg_parser.add_argument('--seed', type=int, default=1, help='随机数种子')
+    args = arg_parser.parse_args(argv)
+
+    run(args.output_dir, args.page_lines, args.samples, args.seed)
+
+if __name__ == "__main__":
+    main()
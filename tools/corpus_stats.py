@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""语料统计
+
+单遍流式扫描诗词数据，复用解析器的长度计算和格式化器的换行规则，按分类统计：
+诗词数量、长度分布、页数分布、诗词最多的作者、无法断开的超宽行。
+用于选择 poem_length_range、page_lines 和 poems_per_file，不生成任何文件。
+
+用法:
+    python main.py --stats
+    python -m tools.corpus_stats [--config config.json] [--bucket 20] [--top 10]
+"""
+import argparse
+import heapq
+import os
+import sys
+import time
+from array import array
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from config.settings import Settings
+from parser.json_parser import JsonParser
+from parser.poem_filter import PoemFilter
+from formatter.page_formatter import PageFormatter
+
+MAX_EXAMPLES = 5
+
+def _increment(counter, index, amount=1):
+    """数组计数器加一，按需扩容"""
+    if index >= len(counter):
+        counter.extend([0] * (index + 1 - len(counter)))
+    counter[index] += amount
+
+class CategoryStats:
+    """单个分类的统计（数组计数器，不保留逐首诗词对象）"""
+
+    def __init__(self, length_bucket):
+        self.length_bucket = length_bucket
+        self.count = 0
+        self.total_chars = 0
+        self.min_length = None
+        self.max_length = 0
+        self.total_pages = 0
+        self.length_hist = array('L')  # 下标: 长度 // length_bucket
+        self.page_hist = array('L')  # 下标: 页数
+        self.author_ids = {}  # {作者: 下标}
+        self.author_names = []
+        self.author_counts = array('L')
+        self.overlong_lines = 0
+        self.overlong_poems = 0
+        self.overlong_examples = []  # 前几首含超宽行的诗词标题
+
+    def add(self, poem, page_count, overlong):
+        length = poem['length']
+        self.count += 1
+        self.total_chars += length
+        self.min_length = length if self.min_length is None else min(self.min_length, length)
+        self.max_length = max(self.max_length, length)
+        self.total_pages += page_count
+        _increment(self.length_hist, length // self.length_bucket)
+        _increment(self.page_hist, page_count)
+
+        author = poem['author']
+        author_id = self.author_ids.get(author)
+        if author_id is None:
+            author_id = len(self.author_names)
+            self.author_ids[author] = author_id
+            self.author_names.append(author)
+            self.author_counts.append(0)
+        self.author_counts[author_id] += 1
+
+        if overlong:
+            self.overlong_lines += overlong
+            self.overlong_poems += 1
+            if len(self.overlong_examples) < MAX_EXAMPLES:
+                self.overlong_examples.append(poem['title'])
+
+    def merge(self, other):
+        """合并另一个分类的统计（用于汇总）"""
+        if not other.count:
+            return
+        self.count += other.count
+        self.total_chars += other.total_chars
+        self.min_length = other.min_length if self.min_length is None else min(self.min_length, other.min_length)
+        self.max_length = max(self.max_length, other.max_length)
+        self.total_pages += other.total_pages
+        for idx, value in enumerate(other.length_hist):
+            if value:
+                _increment(self.length_hist, idx, value)
+        for idx, value in enumerate(other.page_hist):
+            if value:
+                _increment(self.page_hist, idx, value)
+        for author, author_id in other.author_ids.items():
+            own_id = self.author_ids.get(author)
+            if own_id is None:
+                own_id = len(self.author_names)
+                self.author_ids[author] = own_id
+                self.author_names.append(author)
+                self.author_counts.append(0)
+            self.author_counts[own_id] += other.author_counts[author_id]
+        self.overlong_lines += other.overlong_lines
+        self.overlong_poems += other.overlong_poems
+        self.overlong_examples.extend(other.overlong_examples[:MAX_EXAMPLES - len(self.overlong_examples)])
+
+    def length_percentile(self, fraction):
+        """按长度分布估算分位数（返回所在区间的上界）"""
+        target = self.count * fraction
+        seen = 0
+        for idx, value in enumerate(self.length_hist):
+            seen += value
+            if seen >= target and value:
+                return min((idx + 1) * self.length_bucket - 1, self.max_length)
+        return self.max_length
+
+    def top_authors(self, top):
+        ids = heapq.nlargest(top, range(len(self.author_counts)), key=self.author_counts.__getitem__)
+        return [(self.author_names[idx], self.author_counts[idx]) for idx in ids]
+
+def collect_stats(parser, formatter, poem_filter, length_bucket=20):
+    """单遍扫描语料
+    Args:
+        parser: JsonParser
+        formatter: PageFormatter（提供换行和分页规则）
+        poem_filter: 筛选条件
+        length_bucket: 长度分布的区间宽度
+    Returns:
+        dict: {分类名: CategoryStats}
+    """
+    stats = {}
+    for category, poem in parser.iter_poems(poem_filter=poem_filter):
+        category_stats = stats.get(category)
+        if category_stats is None:
+            category_stats = stats[category] = CategoryStats(length_bucket)
+        _, page_count, overlong = formatter.measure_poem(poem)
+        category_stats.add(poem, page_count, overlong)
+    return stats
+
+def _bar(value, peak, width=30):
+    return '█' * max(1, round(value * width / peak)) if value else ''
+
+def print_category(name, stats, top=10):
+    """打印单个分类（或汇总）的统计"""
+    print(f"\n【{name}】 {stats.count} 首，{stats.total_chars} 字，共 {stats.total_pages} 页")
+    if not stats.count:
+        return
+    print(f"  长度: 最短 {stats.min_length}  最长 {stats.max_length}  平均 {stats.total_chars / stats.count:.1f}"
+          f"  P50≈{stats.length_percentile(0.5)}  P90≈{stats.length_percentile(0.9)}  P99≈{stats.length_percentile(0.99)}")
+
+    print("  长度分布:")
+    peak = max(stats.length_hist)
+    for idx, value in enumerate(stats.length_hist):
+        if value:
+            low = idx * stats.length_bucket
+            print(f"    {low:>5}-{low + stats.length_bucket - 1:<5}{value:>8}  {_bar(value, peak)}")
+
+    print("  页数分布:")
+    peak = max(stats.page_hist)
+    for pages, value in enumerate(stats.page_hist):
+        if value:
+            print(f"    {pages:>5} 页{value:>10}  {_bar(value, peak)}")
+
+    print("  诗词最多的作者:")
+    for author, count in stats.top_authors(top):
+        print(f"    {author}　{count}")
+
+    if stats.overlong_lines:
+        print(f"  超宽行: {stats.overlong_lines} 行（{stats.overlong_poems} 首），如: {'、'.join(stats.overlong_examples)}")
+    else:
+        print("  超宽行: 无")
+
+def run(settings, poetry_root, length_bucket=20, top=10):
+    """按配置统计语料并打印报告"""
+    start_time = time.perf_counter()
+    JsonParser.TITLE_SEPARATOR = settings.title_separator
+    parser = JsonParser(poetry_root, text_conversion=settings.text_conversion)
+    formatter = PageFormatter(settings)
+    stats = collect_stats(parser, formatter, PoemFilter.from_settings(settings), length_bucket)
+
+    print(f"页面设置: {settings.lines_per_page}行 × {settings.chars_per_line}字符"
+          f"（每页正文 {settings.lines_per_page - 3} 行）")
+    total = CategoryStats(length_bucket)
+    for category in sorted(stats):
+        print_category(category, stats[category], top)
+        total.merge(stats[category])
+    if len(stats) > 1:
+        print_category('合计', total, top)
+
+    if total.count:
+        poems_per_file = settings.poems_per_file
+        files = sum((item.count + poems_per_file - 1) // poems_per_file for item in stats.values())
+        print(f"\n按每文件 {poems_per_file} 首将生成 {files} 个诗词文件")
+    print(f"统计耗时: {time.perf_counter() - start_time:.2f} 秒")
+    return stats
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description='语料统计')
+    arg_parser.add_argument('--config', default=os.path.join(PROJECT_ROOT, 'config.json'), help='配置文件路径')
+    arg_parser.add_argument('--bucket', type=int, default=20, help='长度分布的区间宽度（字符）')
+    arg_parser.add_argument('--top', type=int, default=10, help='列出诗词最多的前几位作者')
+    args = arg_parser.parse_args(argv)
+
+    settings = Settings()
+    if os.path.exists(args.config):
+        settings.load_from_file(args.config)
+    poetry_root = os.path.abspath(os.path.join(PROJECT_ROOT, settings.poetry_root_dir))
+    run(settings, poetry_root, args.bucket, args.top)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""输出编码对比报告
+
+用同一份诗词数据分别按各输出编码编码排版结果，对比文件体积和编解码吞吐量。
+
+用法:
+    python -m tools.encoding_report [--config config.json] [--limit 1000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from config.settings import Settings
+from parser.json_parser import JsonParser
+from parser.poem_filter import PoemFilter
+from formatter.page_formatter import PageFormatter
+from generator.output_encoding import OUTPUT_ENCODINGS, encode_text
+
+def render_texts(settings, poems_by_category, limit=None):
+    """按当前排版配置渲染诗词，返回与写入文件一致的文本列表（一首一项）"""
+    formatter = PageFormatter(settings)
+    texts = []
+    for category, poems in sorted(poems_by_category.items()):
+        for poem in poems:
+            texts.append('\n'.join(formatter.format_poem(poem)))
+            if limit and len(texts) >= limit:
+                return texts
+    return texts
+
+def measure_encoding(texts, encoding, repeat=3):
+    """测量一种编码的体积和编解码耗时（取多次中的最快值）
+    Returns:
+        tuple: (总字节数, 编码秒数, 解码秒数)
+    """
+    codec, _ = OUTPUT_ENCODINGS[encoding]
+    encode_seconds = decode_seconds = float('inf')
+    encoded = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        encoded = [encode_text(text, encoding) for text in texts]
+        encode_seconds = min(encode_seconds, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for data in encoded:
+            data.decode(codec)
+        decode_seconds = min(decode_seconds, time.perf_counter() - start)
+
+    total_bytes = sum(len(data) for data in encoded)
+    return total_bytes, encode_seconds, decode_seconds
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description='输出编码对比报告')
+    arg_parser.add_argument('--config', default=os.path.join(PROJECT_ROOT, 'config.json'), help='配置文件路径')
+    arg_parser.add_argument('--limit', type=int, default=0, help='最多统计的诗词数（0=全部）')
+    arg_parser.add_argument('--repeat', type=int, default=3, help='每种编码重复测量次数')
+    args = arg_parser.parse_args(argv)
+
+    settings = Settings()
+    if os.path.exists(args.config):
+        settings.load_from_file(args.config)
+    JsonParser.TITLE_SEPARATOR = settings.title_separator
+
+    poetry_root = os.path.abspath(os.path.join(PROJECT_ROOT, settings.poetry_root_dir))
+    parser = JsonParser(poetry_root, text_conversion=settings.text_conversion)
+    poems_by_category = parser.load_all_poems(poem_filter=PoemFilter.from_settings(settings))
+
+    texts = render_texts(settings, poems_by_category, args.limit)
+    total_chars = sum(len(text) for text in texts)
+    print(f"\n共 {len(texts)} 首诗词，{total_chars} 个字符")
+    print(f"页面设置: {settings.lines_per_page}行 × {settings.chars_per_line}字符\n")
+
+    results = []
+    for encoding in OUTPUT_ENCODINGS:
+        results.append((encoding,) + measure_encoding(texts, encoding, args.repeat))
+
+    baseline_bytes = results[0][1]
+    print(f"{'编码':<10}{'总大小(KB)':>12}{'相对UTF-8':>12}{'字节/字符':>10}{'编码MB/s':>10}{'解码MB/s':>10}")
+    print("-" * 64)
+    for encoding, total_bytes, encode_seconds, decode_seconds in results:
+        mb = total_bytes / (1024 * 1024)
+        print(f"{encoding:<10}{total_bytes / 1024:>12.1f}{total_bytes / baseline_bytes:>12.1%}"
+              f"{total_bytes / max(total_chars, 1):>10.2f}"
+              f"{mb / max(encode_seconds, 1e-9):>10.1f}{mb / max(decode_seconds, 1e-9):>10.1f}")
+
+if __name__ == "__main__":
+    main()
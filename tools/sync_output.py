@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""输出目录同步工具
+
+将新生成的输出目录同步到已挂载的设备或 SD 卡目录，只复制新增和变化的文件，
+并删除以前同步过、但源目录中已不存在的文件。
+比较依据为文件大小和流式内容哈希，哈希并行计算；目标目录中的文件哈希缓存在目标根目录的清单文件里，
+文件大小和修改时间与清单一致时直接复用，不再从设备读取。清单同时记录了本工具同步过哪些文件，
+不在清单中的文件（用户自己放入的文件）默认保留，只有加 --delete-unknown 时才删除。
+
+用法:
+    python -m tools.sync_output <输出目录> <设备目录> [--dry-run] [--rehash] [--keep-extra | --delete-unknown]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from tools.verify_output import CHUNK_SIZE, hash_file, list_tree
+
+MANIFEST_NAME = '.sync_manifest.json'
+MANIFEST_VERSION = 1
+
+def _list_files(root, executor):
+    """列出目录树中的文件（不含同步清单和生成日志），目录不存在时返回空字典
+    Returns:
+        dict: {相对路径: (文件大小, 修改时间ns)}
+    """
+    if not os.path.isdir(root):
+        return {}
+    files = list_tree(root, executor, with_mtime=True)
+    files.pop(MANIFEST_NAME, None)
+    return files
+
+def load_manifest(target_dir):
+    """读取目标目录中缓存的清单
+    Returns:
+        dict: {相对路径: [文件大小, 修改时间ns, 哈希]}，清单不存在或无法读取时返回空字典
+    """
+    path = os.path.join(target_dir, MANIFEST_NAME)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get('version') != MANIFEST_VERSION:
+        return {}
+    return data.get('files', {})
+
+def save_manifest(target_dir, manifest):
+    """写入清单（先写临时文件再替换，避免拔出设备时留下半个清单）"""
+    path = os.path.join(target_dir, MANIFEST_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_VERSION, 'files': manifest}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def copy_file(src_path, dst_path):
+    """流式复制文件并同时计算内容哈希（先写临时文件再替换）
+    Returns:
+        str: 内容哈希
+    """
+    os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+    tmp_path = dst_path + '.tmp'
+    digest = hashlib.blake2b(digest_size=16)
+    with open(src_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+        while True:
+            chunk = src.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            dst.write(chunk)
+    os.replace(tmp_path, dst_path)
+    return digest.hexdigest()
+
+def _remove_empty_dirs(root, deleted_paths):
+    """删除因删除文件而变空的目录（自底向上，只处理这些文件所在的目录及其上级，不删除根目录）"""
+    candidates = set()
+    for path in deleted_paths:
+        rel_dir = os.path.dirname(path)
+        while rel_dir:
+            candidates.add(rel_dir)
+            rel_dir = os.path.dirname(rel_dir)
+
+    removed = 0
+    # 路径更深的目录先处理，子目录删除后上级目录才可能变空
+    for rel_dir in sorted(candidates, key=lambda path: path.count(os.sep), reverse=True):
+        dir_path = os.path.join(root, rel_dir)
+        if os.path.isdir(dir_path) and not os.listdir(dir_path):
+            os.rmdir(dir_path)
+            removed += 1
+    return removed
+
+def plan_sync(source_dir, target_dir, executor, rehash=False, delete_unknown=False):
+    """比较源目录和目标目录
+    Args:
+        source_dir: 新生成的输出目录
+        target_dir: 设备目录
+        executor: 线程池（并行计算哈希）
+        rehash: 忽略清单中缓存的哈希，重新读取目标文件计算哈希
+        delete_unknown: 源目录中没有的文件即使不是本工具同步的也删除
+    Returns:
+        dict: {copy, delete, unknown, previous, unchanged, manifest, hashed, source_files}
+            copy: 需要复制的相对路径列表
+            delete: 需要删除的相对路径列表（以前同步过、源目录中已不存在的文件）
+            unknown: 源目录中没有、也不在清单中的文件（保留，delete_unknown 时已并入 delete）
+            previous: 上次同步的清单
+            unchanged: 内容一致的文件数
+            manifest: 内容一致文件的清单条目 {相对路径: [大小, 修改时间ns, 哈希]}
+            hashed: 实际读取计算哈希的字节数
+            source_files: 源目录文件 {相对路径: (大小, 修改时间ns)}
+    """
+    source_files = _list_files(source_dir, executor)
+    target_files = _list_files(target_dir, executor)
+    # 清单既是哈希缓存，也是本工具同步过的文件列表；--rehash 只忽略其中的哈希
+    previous = load_manifest(target_dir)
+    cached = {} if rehash else previous
+
+    copy = sorted(path for path in source_files if path not in target_files)
+    extra = sorted(path for path in target_files if path not in source_files)
+    if delete_unknown:
+        delete, unknown = extra, []
+    else:
+        delete = [path for path in extra if path in previous]
+        unknown = [path for path in extra if path not in previous]
+
+    # 大小不同的文件无需计算哈希即可判定需要复制
+    candidates = []
+    for path in sorted(set(source_files) & set(target_files)):
+        if source_files[path][0] != target_files[path][0]:
+            copy.append(path)
+        else:
+            candidates.append(path)
+
+    # 目标文件的大小和修改时间与清单一致时复用缓存的哈希，否则从设备读取
+    target_hashes = {}
+    to_hash_target = []
+    for path in candidates:
+        entry = cached.get(path)
+        if entry and entry[0] == target_files[path][0] and entry[1] == target_files[path][1]:
+            target_hashes[path] = entry[2]
+        else:
+            to_hash_target.append(path)
+
+    source_hashes = executor.map(hash_file, [os.path.join(source_dir, path) for path in candidates])
+    fresh_hashes = executor.map(hash_file, [os.path.join(target_dir, path) for path in to_hash_target])
+    target_hashes.update(zip(to_hash_target, fresh_hashes))
+
+    manifest = {}
+    for path, source_hash in zip(candidates, source_hashes):
+        if source_hash == target_hashes[path]:
+            size, mtime_ns = target_files[path]
+            manifest[path] = [size, mtime_ns, source_hash]
+        else:
+            copy.append(path)
+
+    hashed = sum(source_files[path][0] for path in candidates) + sum(target_files[path][0] for path in to_hash_target)
+    return {
+        'copy': sorted(copy),
+        'delete': delete,
+        'unknown': unknown,
+        'previous': previous,
+        'unchanged': len(manifest),
+        'manifest': manifest,
+        'hashed': hashed,
+        'source_files': source_files,
+    }
+
+def sync_trees(source_dir, target_dir, workers=None, dry_run=False, rehash=False, keep_extra=False,
+               delete_unknown=False):
+    """同步输出目录到设备目录并打印报告
+    Args:
+        source_dir: 新生成的输出目录
+        target_dir: 设备目录
+        workers: 并行线程数
+        dry_run: 只报告将要复制和删除的文件，不做修改
+        rehash: 忽略清单中缓存的哈希
+        keep_extra: 以前同步过、源目录中已不存在的文件也保留
+        delete_unknown: 同时删除目标目录中不是本工具同步的多余文件
+    Returns:
+        dict: 汇总统计
+    """
+    if not os.path.isdir(source_dir):
+        raise FileNotFoundError(f"输出目录不存在: {source_dir}")
+
+    start_time = time.perf_counter()
+    workers = workers or min(32, (os.cpu_count() or 1) * 4)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        plan = plan_sync(source_dir, target_dir, executor, rehash, delete_unknown)
+        to_delete = [] if keep_extra else plan['delete']
+        copied_bytes = sum(plan['source_files'][path][0] for path in plan['copy'])
+
+        print(f"源目录: {source_dir}")
+        print(f"目标目录: {target_dir}")
+        print(f"未变化: {plan['unchanged']} 个文件")
+        print(f"需复制: {len(plan['copy'])} 个文件（{copied_bytes / 1024 / 1024:.1f} MB）")
+        print(f"需删除: {len(to_delete)} 个文件")
+        if plan['unknown']:
+            print(f"保留: {len(plan['unknown'])} 个不是本工具同步的文件（--delete-unknown 可删除）")
+
+        if dry_run:
+            for path in plan['copy']:
+                print(f"  + {path}")
+            for path in to_delete:
+                print(f"  - {path}")
+            print(f"\n（试运行，未修改目标目录）耗时: {time.perf_counter() - start_time:.2f} 秒")
+            return plan
+
+        os.makedirs(target_dir, exist_ok=True)
+        manifest = plan['manifest']
+        if keep_extra:
+            # 保留下来的旧文件仍记在清单中，以后不加 --keep-extra 同步时照常删除
+            for path in plan['delete']:
+                manifest[path] = plan['previous'][path]
+        copied_hashes = executor.map(
+            copy_file,
+            [os.path.join(source_dir, path) for path in plan['copy']],
+            [os.path.join(target_dir, path) for path in plan['copy']],
+        )
+        for path, file_hash in zip(plan['copy'], copied_hashes):
+            stat = os.stat(os.path.join(target_dir, path))
+            manifest[path] = [stat.st_size, stat.st_mtime_ns, file_hash]
+
+    for path in to_delete:
+        os.remove(os.path.join(target_dir, path))
+    removed_dirs = _remove_empty_dirs(target_dir, to_delete)
+
+    save_manifest(target_dir, manifest)
+
+    elapsed = time.perf_counter() - start_time
+    print(f"\n已复制 {len(plan['copy'])} 个文件，删除 {len(to_delete)} 个文件、{removed_dirs} 个空目录")
+    print(f"读取哈希 {plan['hashed'] / 1024 / 1024:.1f} MB，耗时: {elapsed:.2f} 秒")
+    return plan
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description='只复制变化文件的输出目录同步工具')
+    arg_parser.add_argument('source', help='新生成的输出目录')
+    arg_parser.add_argument('target', help='设备或 SD 卡上的目标目录')
+    arg_parser.add_argument('--dry-run', action='store_true', help='只列出将要复制和删除的文件')
+    arg_parser.add_argument('--rehash', action='store_true', help='忽略缓存的清单，重新读取目标文件计算哈希')
+    extra_group = arg_parser.add_mutually_exclusive_group()
+    extra_group.add_argument('--keep-extra', action='store_true', help='保留以前同步过、但源目录中已不存在的文件')
+    extra_group.add_argument('--delete-unknown', action='store_true',
+                             help='同时删除目标目录中不是本工具同步的文件（默认保留）')
+    arg_parser.add_argument('--workers', type=int, default=None, help='并行线程数')
+    args = arg_parser.parse_args(argv)
+
+    sync_trees(args.source, args.target, args.workers, args.dry_run, args.rehash, args.keep_extra,
+               args.delete_unknown)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+"""输出差异校验工具
+
+逐字节比较两棵输出目录树，或用参考配置和候选配置分别渲染同一份诗词数据后比较，
+用于确认排版/生成的性能优化没有改变任何填充、分页和边框文字。
+
+用法:
+    python -m tools.verify_output tree <参考目录> <候选目录> [--page-lines 14]
+    python -m tools.verify_output render <参考配置.json> <候选配置.json>
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from config.settings import Settings
+from parser.json_parser import JsonParser
+from parser.poem_filter import PoemFilter
+from parser.poem_sorter import load_poems
+from generator.output_journal import JOURNAL_NAME
+from formatter.render_cache import RenderCache
+
+CHUNK_SIZE = 1024 * 1024
+
+def _file_info(entry, with_mtime):
+    """文件大小，with_mtime 时为 (文件大小, 修改时间ns)"""
+    stat = entry.stat()
+    return (stat.st_size, stat.st_mtime_ns) if with_mtime else stat.st_size
+
+def _walk_files(root, rel_dir='', with_mtime=False):
+    """递归列出目录下的所有文件
+    Returns:
+        dict: {相对路径: 文件大小}，with_mtime 时为 {相对路径: (文件大小, 修改时间ns)}
+    """
+    files = {}
+    with os.scandir(os.path.join(root, rel_dir)) as entries:
+        for entry in entries:
+            rel_path = os.path.join(rel_dir, entry.name)
+            if entry.is_dir(follow_symlinks=False):
+                files.update(_walk_files(root, rel_path, with_mtime))
+            elif entry.is_file(follow_symlinks=False):
+                files[rel_path] = _file_info(entry, with_mtime)
+    return files
+
+def list_tree(root, executor, with_mtime=False):
+    """并行遍历目录树（每个一级子目录一个任务，不含生成日志）
+    Args:
+        root: 根目录
+        executor: 线程池
+        with_mtime: 同时返回修改时间（同步工具用于复用缓存的哈希）
+    Returns:
+        dict: {相对路径: 文件大小}，with_mtime 时为 {相对路径: (文件大小, 修改时间ns)}
+    """
+    files = {}
+    futures = []
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                futures.append(executor.submit(_walk_files, root, entry.name, with_mtime))
+            elif entry.is_file(follow_symlinks=False) and entry.name != JOURNAL_NAME:
+                files[entry.name] = _file_info(entry, with_mtime)
+    for future in futures:
+        files.update(future.result())
+    return files
+
+def hash_file(path):
+    """流式计算文件内容哈希"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _decode(data):
+    """按BOM或内容识别输出编码并解码"""
+    if data.startswith(b'\xff\xfe'):
+        return data[2:].decode('utf-16-le', errors='replace')
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode('gb18030', errors='replace')
+
+def first_difference(path_a, path_b, page_lines=None):
+    """定位两个文件的第一处差异
+    Args:
+        path_a: 参考文件
+        path_b: 候选文件
+        page_lines: 每页行数（提供时换算为页码和页内行号）
+    Returns:
+        dict: {line, page, page_line, expected, actual}
+    """
+    with open(path_a, 'rb') as f:
+        lines_a = _decode(f.read()).split('\n')
+    with open(path_b, 'rb') as f:
+        lines_b = _decode(f.read()).split('\n')
+
+    line_idx = 0
+    for line_idx in range(max(len(lines_a), len(lines_b))):
+        line_a = lines_a[line_idx] if line_idx < len(lines_a) else None
+        line_b = lines_b[line_idx] if line_idx < len(lines_b) else None
+        if line_a != line_b:
+            break
+    else:
+        # 文本一致，差异只在编码层面
+        line_a = line_b = None
+
+    diff = {'line': line_idx + 1, 'page': None, 'page_line': None,
+            'expected': line_a, 'actual': line_b}
+    if page_lines:
+        diff['page'] = line_idx // page_lines + 1
+        diff['page_line'] = line_idx % page_lines + 1
+    return diff
+
+def compare_trees(dir_a, dir_b, page_lines=None, workers=None, max_reports=20, hash_list=None):
+    """比较两棵输出目录树并打印报告
+    Args:
+        dir_a: 参考目录
+        dir_b: 候选目录
+        page_lines: 每页行数（用于定位差异所在页）
+        workers: 并行线程数
+        max_reports: 最多详细报告的差异文件数
+        hash_list: 逐文件哈希清单的输出路径（可选，提供时对全部文件计算哈希）
+    Returns:
+        dict: 汇总统计
+    """
+    start_time = time.perf_counter()
+    workers = workers or min(32, (os.cpu_count() or 1) * 4)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        files_a = list_tree(dir_a, executor)
+        files_b = list_tree(dir_b, executor)
+
+        only_a = sorted(set(files_a) - set(files_b))
+        only_b = sorted(set(files_b) - set(files_a))
+        common = sorted(set(files_a) & set(files_b))
+
+        # 大小不同的文件无需计算哈希即可判定不同（需要完整清单时除外）
+        size_mismatch = [path for path in common if files_a[path] != files_b[path]]
+        to_hash = common if hash_list else [path for path in common if files_a[path] == files_b[path]]
+
+        hashes_a = executor.map(hash_file, [os.path.join(dir_a, path) for path in to_hash])
+        hashes_b = executor.map(hash_file, [os.path.join(dir_b, path) for path in to_hash])
+        file_hashes = dict(zip(to_hash, zip(hashes_a, hashes_b)))
+
+    different = sorted(set(size_mismatch) | {path for path, (hash_a, hash_b) in file_hashes.items() if hash_a != hash_b})
+    identical = len(common) - len(different)
+    total_bytes = sum(files_a.values()) + sum(files_b.values())
+    elapsed = time.perf_counter() - start_time
+
+    for path in different[:max_reports]:
+        diff = first_difference(os.path.join(dir_a, path), os.path.join(dir_b, path), page_lines)
+        if path in file_hashes:
+            hash_a, hash_b = file_hashes[path]
+        else:
+            hash_a, hash_b = hash_file(os.path.join(dir_a, path)), hash_file(os.path.join(dir_b, path))
+        print(f"\n[不同] {path}")
+        print(f"  参考: {hash_a}  {files_a[path]} 字节")
+        print(f"  候选: {hash_b}  {files_b[path]} 字节")
+        if diff['expected'] is None and diff['actual'] is None:
+            print("  文本内容一致，仅字节编码不同")
+            continue
+        location = f"第{diff['line']}行"
+        if diff['page']:
+            location = f"第{diff['page']}页第{diff['page_line']}行（全文{location}）"
+        print(f"  首个差异: {location}")
+        print(f"    参考: {diff['expected']!r}")
+        print(f"    候选: {diff['actual']!r}")
+    if len(different) > max_reports:
+        print(f"\n... 另有 {len(different) - max_reports} 个不同文件未详细列出")
+
+    for path in only_a[:max_reports]:
+        print(f"[缺失] {path}")
+    for path in only_b[:max_reports]:
+        print(f"[多余] {path}")
+
+    if hash_list:
+        with open(hash_list, 'w', encoding='utf-8') as f:
+            for path in common:
+                hash_a, hash_b = file_hashes[path]
+                status = '相同' if hash_a == hash_b else '不同'
+                f.write(f"{status}\t{hash_a}\t{hash_b}\t{path}\n")
+            for path in only_a:
+                f.write(f"缺失\t{hash_file(os.path.join(dir_a, path))}\t-\t{path}\n")
+            for path in only_b:
+                f.write(f"多余\t-\t{hash_file(os.path.join(dir_b, path))}\t{path}\n")
+        print(f"\n哈希清单已写入: {hash_list}")
+
+    stats = {
+        'files_a': len(files_a),
+        'files_b': len(files_b),
+        'identical': identical,
+        'different': len(different),
+        'only_a': len(only_a),
+        'only_b': len(only_b),
+        'bytes': total_bytes,
+        'seconds': elapsed,
+    }
+
+    print("\n" + "=" * 60)
+    print(f"参考文件: {stats['files_a']}  候选文件: {stats['files_b']}")
+    print(f"相同: {identical}  不同: {len(different)}  缺失: {len(only_a)}  多余: {len(only_b)}")
+    print(f"读取 {total_bytes / (1024 * 1024):.1f} MB，耗时 {elapsed:.2f} 秒"
+          f"（{total_bytes / (1024 * 1024) / max(elapsed, 1e-9):.1f} MB/s）")
+    print("结果: " + ("完全一致" if is_identical(stats) else "存在差异"))
+    return stats
+
+def is_identical(stats):
+    """汇总统计是否表示两棵树完全一致"""
+    return stats['different'] == 0 and stats['only_a'] == 0 and stats['only_b'] == 0
+
+def _parse_key(settings):
+    """影响解析结果的配置项"""
+    return (settings.poetry_root_dir, settings.text_conversion, settings.title_separator,
+            settings.min_poem_length, settings.max_poem_length,
+            tuple(settings.author_include), tuple(settings.author_exclude), settings.title_regex,
+            tuple(settings.category_include), tuple(settings.category_exclude), settings.poem_order)
+
+def _load_poems(settings):
+    """按配置解析诗词（输入目录与 main.py 一样相对于项目根目录，poem_order 同样生效）
+    Returns:
+        tuple: (poems_by_category, sorter)，见 load_poems
+    """
+    JsonParser.TITLE_SEPARATOR = settings.title_separator
+    poetry_root = os.path.abspath(os.path.join(PROJECT_ROOT, settings.poetry_root_dir))
+    parser = JsonParser(poetry_root, text_conversion=settings.text_conversion)
+    return load_poems(parser, settings, PoemFilter.from_settings(settings))
+
+def render_and_compare(config_a, config_b, workers=None, hash_list=None):
+    """分别按参考配置和候选配置渲染同一份数据后比较输出"""
+    settings_a = Settings()
+    settings_a.load_from_file(config_a)
+    settings_b = Settings()
+    settings_b.load_from_file(config_b)
+
+    poems_a, sorter_a = _load_poems(settings_a)
+    sorter_b = None
+    if _parse_key(settings_a) == _parse_key(settings_b):
+        poems_b = poems_a
+    else:
+        poems_b, sorter_b = _load_poems(settings_b)
+
+    try:
+        return _render_and_compare(settings_a, poems_a, settings_b, poems_b, workers, hash_list)
+    finally:
+        for sorter in (sorter_a, sorter_b):
+            if sorter:
+                sorter.close()
+
+def _render_and_compare(settings_a, poems_a, settings_b, poems_b, workers, hash_list):
+    """渲染到临时目录并比较"""
+    from main import render_profile
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        settings_a.output_dir = os.path.join(temp_dir, 'reference')
+        settings_b.output_dir = os.path.join(temp_dir, 'candidate')
+
+        for label, settings, poems in (('参考', settings_a, poems_a), ('候选', settings_b, poems_b)):
+            # 与 main.py 一样按配置启用持久化渲染缓存（两份配置依次打开，可以共用同一个缓存文件）
+            render_cache = None
+            if settings.render_cache_path:
+                render_cache = RenderCache(settings.render_cache_path, settings.render_cache_max_mb * 1024 * 1024)
+
+            start_time = time.perf_counter()
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    render_profile(settings, poems, render_cache=render_cache)
+            finally:
+                if render_cache:
+                    render_cache.flush()
+                    cache_stats = render_cache.stats()
+                    render_cache.close()
+            cache_text = ''
+            if render_cache:
+                cache_text = f"（渲染缓存命中 {cache_stats['hits']}，未命中 {cache_stats['misses']}）"
+            print(f"{label}渲染耗时: {time.perf_counter() - start_time:.2f} 秒{cache_text}")
+
+        page_lines = settings_a.lines_per_page if settings_a.lines_per_page == settings_b.lines_per_page else None
+        return compare_trees(settings_a.output_dir, settings_b.output_dir, page_lines, workers, hash_list=hash_list)
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description='输出差异校验工具')
+    sub_parsers = arg_parser.add_subparsers(dest='mode', required=True)
+
+    tree_parser = sub_parsers.add_parser('tree', help='比较两棵已生成的输出目录树')
+    tree_parser.add_argument('reference', help='参考输出目录')
+    tree_parser.add_argument('candidate', help='候选输出目录')
+    tree_parser.add_argument('--page-lines', type=int, default=None, help='每页行数，用于定位差异所在页')
+    tree_parser.add_argument('--workers', type=int, default=None, help='并行线程数')
+    tree_parser.add_argument('--hash-list', default=None, help='将逐文件哈希清单写入该文件')
+
+    render_parser = sub_parsers.add_parser('render', help='按两份配置分别渲染后比较')
+    render_parser.add_argument('reference', help='参考配置文件')
+    render_parser.add_argument('candidate', help='候选配置文件')
+    render_parser.add_argument('--workers', type=int, default=None, help='并行线程数')
+    render_parser.add_argument('--hash-list', default=None, help='将逐文件哈希清单写入该文件')
+
+    args = arg_parser.parse_args(argv)
+    if args.mode == 'tree':
+        stats = compare_trees(args.reference, args.candidate, args.page_lines, args.workers, hash_list=args.hash_list)
+    else:
+        stats = render_and_compare(args.reference, args.candidate, args.workers, hash_list=args.hash_list)
+    return 0 if is_identical(stats) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())